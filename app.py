@@ -1,9 +1,12 @@
 import streamlit as st
 import pandas as pd
-import io
 import os
-from parser import parse_statement
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Any, List
+from result_cache import ResultCache, cached_parse_statement
+from text_cache import TextCache
 from regex_patterns import REGEX_TEMPLATES
+from metrics import REGISTRY, serve_metrics
 
 try:
     from dotenv import load_dotenv
@@ -11,6 +14,115 @@ try:
 except ImportError:
     pass
 
+@st.cache_resource
+def get_result_cache() -> ResultCache:
+    return ResultCache()
+
+@st.cache_resource
+def get_text_cache() -> TextCache:
+    return TextCache()
+
+@st.cache_resource
+def start_metrics_endpoint():
+    """Serves Prometheus metrics when CREDITCARD_INTEL_METRICS_PORT is set."""
+    port = os.environ.get("CREDITCARD_INTEL_METRICS_PORT")
+    return serve_metrics(int(port)) if port else None
+
+@st.cache_resource
+def get_parse_pool() -> ProcessPoolExecutor:
+    return ProcessPoolExecutor()
+
+def parse_uploads_concurrently(uploaded_files: List[Any], api_key: str) -> List[Dict[str, Any]]:
+    """Parses every upload in the worker pool, updating progress as each one finishes."""
+    progress = st.progress(0.0, text=f"🔍 Analyzing {len(uploaded_files)} statements...")
+    status_placeholder = st.empty()
+    statuses = ["⏳ Queued"] * len(uploaded_files)
+    results: List[Dict[str, Any]] = [{} for _ in uploaded_files]
+
+    pool = get_parse_pool()
+    futures = {}
+    for index, uploaded_file in enumerate(uploaded_files):
+        future = pool.submit(
+            cached_parse_statement, uploaded_file.getvalue(), api_key=api_key,
+            cache=get_result_cache(), text_cache=get_text_cache()
+        )
+        futures[future] = index
+        statuses[index] = "🔄 Parsing"
+
+    for done, future in enumerate(as_completed(futures), start=1):
+        index = futures[future]
+        try:
+            results[index] = future.result()
+        except Exception as e:
+            results[index] = {"status": "FAILED", "reason": f"Worker error: {e}"}
+        REGISTRY.observe_result(results[index])
+        statuses[index] = "✅ Done" if results[index].get("status") == "SUCCESS" else "❌ Failed"
+
+        progress.progress(done / len(uploaded_files), text=f"Parsed {done}/{len(uploaded_files)}: {uploaded_files[index].name}")
+        status_placeholder.dataframe(
+            pd.DataFrame({"File": [f.name for f in uploaded_files], "Progress": statuses}),
+            hide_index=True,
+            use_container_width=True
+        )
+
+    status_placeholder.empty()
+    progress.empty()
+    return results
+
+def render_batch_results(uploaded_files: List[Any], api_key: str) -> None:
+    """Shows one consolidated table and a single CSV download for a multi-file upload."""
+    results = parse_uploads_concurrently(uploaded_files, api_key)
+
+    rows = []
+    for uploaded_file, result in zip(uploaded_files, results):
+        succeeded = result.get("status") == "SUCCESS"
+        rows.append({
+            "File": uploaded_file.name,
+            "Status": "✅ Success" if succeeded else "❌ Failed",
+            "Bank": result.get("bank_name", "N/A"),
+            "Extraction Method": result.get("extraction_method", "N/A"),
+            "Card Last 4 Digits": result.get("card_last_4_digits", "NOT_FOUND"),
+            "Statement Date": result.get("statement_date", "NOT_FOUND"),
+            "Payment Due Date": result.get("payment_due_date", "NOT_FOUND"),
+            "Total Amount Due": result.get("total_due", "NOT_FOUND"),
+            "Minimum Amount Due": result.get("min_payment", "NOT_FOUND"),
+            "Reason": "" if succeeded else result.get("reason", "Unknown error occurred."),
+        })
+    df_batch = pd.DataFrame(rows)
+
+    st.markdown('<div class="results-card">', unsafe_allow_html=True)
+    st.markdown(f"### 📊 Batch Results ({len(rows)} statements)")
+
+    succeeded_count = sum(1 for row in rows if row["Status"] == "✅ Success")
+    col_stat1, col_stat2, col_stat3 = st.columns(3)
+    with col_stat1:
+        st.metric("Statements", len(rows))
+    with col_stat2:
+        st.metric("Successful", succeeded_count)
+    with col_stat3:
+        st.metric("Failed", len(rows) - succeeded_count)
+
+    def highlight_status(row):
+        if row['Status'] == "❌ Failed":
+            return ['background-color: #fed7d7; color: #742a2a; font-weight: 700'] * len(row)
+        else:
+            return ['background-color: #c6f6d5; color: #22543d; font-weight: 700'] * len(row)
+
+    st.dataframe(
+        df_batch.style.apply(highlight_status, axis=1),
+        hide_index=True,
+        use_container_width=True
+    )
+
+    st.markdown("---")
+    st.download_button(
+        label="📥 Download All Results as CSV",
+        data=df_batch.to_csv(index=False),
+        file_name="statement_data_batch.csv",
+        mime="text/csv"
+    )
+    st.markdown('</div>', unsafe_allow_html=True)
+
 def main():
     """CreditCard Intel - Enhanced Visibility & Modern Design"""
 
@@ -22,6 +134,7 @@ def main():
         layout="wide",
         initial_sidebar_state="expanded"
     )
+    start_metrics_endpoint()
 
     st.markdown("""
         <style>
@@ -445,21 +558,30 @@ def main():
         st.markdown("""
             <div class="upload-instruction">
                 <h4>📄 Drag & Drop Your PDF Here</h4>
-                <p>or click "Browse files" button below • Max: 200MB • PDF Only</p>
+                <p>or click "Browse files" button below • Multiple files supported • Max: 200MB • PDF Only</p>
             </div>
         """, unsafe_allow_html=True)
         
-        uploaded_file = st.file_uploader(
-            "Choose a PDF file",
+        uploaded_files = st.file_uploader(
+            "Choose PDF files",
             type="pdf",
-            help="Upload a credit card statement from supported banks"
+            accept_multiple_files=True,
+            help="Upload one or more credit card statements from supported banks"
         )
         st.markdown('</div>', unsafe_allow_html=True)
         
+        uploaded_file = uploaded_files[0] if len(uploaded_files or []) == 1 else None
+        
+        if uploaded_files and len(uploaded_files) > 1:
+            render_batch_results(uploaded_files, gemini_api_key)
+        
         if uploaded_file:
             with st.spinner('🔍 Analyzing your statement...'):
-                bytes_data = io.BytesIO(uploaded_file.getvalue())
-                results = parse_statement(bytes_data, api_key=gemini_api_key)
+                results = cached_parse_statement(
+                    uploaded_file.getvalue(), api_key=gemini_api_key, cache=get_result_cache(),
+                    text_cache=get_text_cache()
+                )
+                REGISTRY.observe_result(results)
             
             st.markdown('<div class="results-card">', unsafe_allow_html=True)
             
@@ -0,0 +1,64 @@
+import re
+from typing import Dict, Optional, Pattern
+from regex_patterns import REGEX_TEMPLATES
+
+POSITION_DECAY_CHARS = 2000
+
+
+def _normalize_identifier(identifier: str) -> str:
+    return " ".join(identifier.upper().split())
+
+
+class BankClassifier:
+    """
+    Multi-keyword bank classifier built once from every template's
+    `identifier` list. All keywords are folded into a single alternation
+    (longest first, so "HDFC BANK" wins over "HDFC" at the same spot) and
+    the text is scanned once. Each hit adds a position-weighted score to
+    its bank, so a header mention outweighs stray mentions in transactions.
+    """
+
+    def __init__(self, templates: Dict[str, dict], decay_chars: int = POSITION_DECAY_CHARS):
+        self.decay_chars = decay_chars
+        self.bank_order = list(templates.keys())
+        self.keyword_to_bank: Dict[str, str] = {}
+        for bank_key, template in templates.items():
+            for identifier in template.get("identifier", []):
+                self.keyword_to_bank.setdefault(_normalize_identifier(identifier), bank_key)
+
+        keywords = sorted(self.keyword_to_bank, key=len, reverse=True)
+        self.pattern: Optional[Pattern] = None
+        if keywords:
+            alternation = "|".join(r"\s+".join(re.escape(w) for w in k.split()) for k in keywords)
+            self.pattern = re.compile(alternation)
+
+    def score(self, text: str, max_chars: int = None, folded: bool = False) -> Dict[str, float]:
+        """
+        Returns a per-bank score; banks with no keyword hits are omitted.
+        Pass folded=True when text is already upper-cased.
+        """
+        scores: Dict[str, float] = {}
+        if not text or self.pattern is None:
+            return scores
+
+        if max_chars is not None:
+            text = text[:max_chars]
+        # Case-folding once and scanning case-sensitively keeps re's literal
+        # prefix optimisation; an IGNORECASE alternation is ~15x slower.
+        for match in self.pattern.finditer(text if folded else text.upper()):
+            bank_key = self.keyword_to_bank.get(" ".join(match.group().split()))
+            if bank_key is None:
+                continue
+            distance = match.start() / self.decay_chars
+            scores[bank_key] = scores.get(bank_key, 0.0) + 1.0 / (1.0 + distance * distance)
+        return scores
+
+    def classify(self, text: str, max_chars: int = None, folded: bool = False) -> str:
+        """Returns the highest-scoring bank key, or "unknown"."""
+        scores = self.score(text, max_chars, folded)
+        if not scores:
+            return "unknown"
+        return max(self.bank_order, key=lambda b: (scores.get(b, 0.0), -self.bank_order.index(b)))
+
+
+BANK_CLASSIFIER = BankClassifier(REGEX_TEMPLATES)
@@ -0,0 +1,395 @@
+import argparse
+import csv
+import glob
+import io
+import json
+import math
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, as_completed, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, List, Iterator, Optional, TextIO
+from cache_utils import sha256_hex
+from journal import MAX_ATTEMPTS, JobJournal
+from parser import KEYS_TO_SEARCH, PAGE_BREAK
+from metrics import REGISTRY, serve_metrics
+from result_cache import bank_key_for_result, cached_parse_statement
+from text_cache import TextCache
+from pdf_backends import LAYOUT_HINTS_ENABLED, PDF_MODE, PDF_MODES, backends_for_mode
+from transactions import iter_transactions, iter_transactions_from_pages
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+CSV_COLUMNS = ["path", "status", "bank_name", "extraction_method"] + KEYS_TO_SEARCH + [
+    "llm_status", "reason", "elapsed_ms", "transaction_count",
+]
+
+# A journaled job emits results in input order, so finished results wait for
+# slower earlier ones; parses are not dispatched further ahead than this.
+REORDER_WINDOW = 256
+
+_worker_text_cache: Optional[TextCache] = None
+
+
+def discover_files(target: str) -> List[str]:
+    """Expands a directory (recursively) or a glob pattern into a sorted list of PDF paths."""
+    if os.path.isdir(target):
+        pattern = os.path.join(target, "**", "*.pdf")
+    else:
+        pattern = target
+    paths = [p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p)]
+    return sorted(p for p in paths if p.lower().endswith(".pdf"))
+
+
+def _init_worker(text_cache_path: Optional[str]) -> None:
+    global _worker_text_cache
+    _worker_text_cache = TextCache(text_cache_path) if text_cache_path else None
+
+
+def _transaction_rows(pdf_bytes: bytes, result: Dict[str, Any], pdf_mode: str = None) -> Iterator[Any]:
+    """
+    Transaction rows of a parsed statement, for the bank the parse already
+    identified. The text stage's raw_text is reused, split back into pages
+    at PAGE_BREAK; only a layout-hint hit, whose raw_text holds just the
+    hinted regions, reads the PDF pages again.
+    """
+    bank_key = bank_key_for_result(result)
+    if result.get("timings", {}).get("layout_hints") == "HIT" or not result.get("raw_text"):
+        return iter_transactions(io.BytesIO(pdf_bytes), bank_key, backends_for_mode(pdf_mode)[0])
+    return iter_transactions_from_pages(result["raw_text"].split(PAGE_BREAK), bank_key)
+
+
+def parse_file(path: str, api_key: str = None, include_raw_text: bool = False,
+               pdf_mode: str = None, layout: bool = None, transactions: bool = False) -> Dict[str, Any]:
+    """
+    Parses one statement from disk; never raises, failures come back as
+    status FAILED. With transactions=True a successful result also carries
+    its transaction rows (as dicts) under "transactions".
+    """
+    start = time.perf_counter()
+    try:
+        with open(path, "rb") as f:
+            pdf_bytes = f.read()
+        pdf_hash = sha256_hex(pdf_bytes)
+        result = cached_parse_statement(pdf_bytes, api_key=api_key, text_cache=_worker_text_cache,
+                                        pdf_mode=pdf_mode, layout=layout)
+        if transactions and result.get("status") == "SUCCESS":
+            result["transactions"] = [row._asdict() for row in _transaction_rows(pdf_bytes, result, pdf_mode)]
+            result["transaction_count"] = len(result["transactions"])
+        result["sha256"] = pdf_hash
+    except Exception as e:
+        result = {"status": "FAILED", "reason": f"Error processing {path}: {e}"}
+    if not include_raw_text:
+        result.pop("raw_text", None)
+    result["path"] = path
+    result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    return result
+
+
+def run_batch(paths: List[str], workers: int = None, api_key: str = None,
+              include_raw_text: bool = False, text_cache_path: str = None,
+              pdf_mode: str = None, layout: bool = None, transactions: bool = False) -> Iterator[Dict[str, Any]]:
+    """Fans the paths out over a process pool and yields results as they complete."""
+    if workers == 1:
+        _init_worker(text_cache_path)
+        for path in paths:
+            yield parse_file(path, api_key, include_raw_text, pdf_mode, layout, transactions)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(text_cache_path,)) as pool:
+        futures = {pool.submit(parse_file, path, api_key, include_raw_text, pdf_mode, layout, transactions): path for path in paths}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                yield {"path": futures[future], "status": "FAILED", "reason": f"Worker crashed: {e}"}
+
+
+def run_job(paths: List[str], journal: JobJournal, workers: int = None, api_key: str = None,
+            include_raw_text: bool = False, text_cache_path: str = None, pdf_mode: str = None,
+            layout: bool = None, transactions: bool = False,
+            max_attempts: int = MAX_ATTEMPTS) -> Iterator[Dict[str, Any]]:
+    """
+    run_batch for a journaled job: yields results in the order of `paths`,
+    replaying the ones the journal already finished instead of parsing them.
+    Every parse runs in a worker process, so a document that crashes the PDF
+    backend only breaks the pool. The documents that were in flight are then
+    retried one at a time, which pins the crash on the right one, and a
+    document started max_attempts times without finishing (in this run or
+    earlier ones) comes back FAILED.
+    """
+    workers = workers or os.cpu_count() or 1
+    parse_args = (api_key, include_raw_text, pdf_mode, layout, transactions)
+    replayed: Dict[int, int] = {}
+    todo: deque = deque()
+    suspects: deque = deque()
+    for index, path in enumerate(paths):
+        offset = journal.completed(path)
+        if offset is not None:
+            replayed[index] = offset
+        elif journal.attempts.get(path):
+            # An earlier run died with this document in flight.
+            suspects.append(index)
+        else:
+            todo.append(index)
+
+    finished: Dict[int, Dict[str, Any]] = {}
+    in_flight: Dict[Future, int] = {}
+
+    def new_pool() -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(text_cache_path,))
+
+    def record(index: int, result: Dict[str, Any]) -> None:
+        if result.get("llm_status") == "FAILED":
+            # Transient LLM failures are parsed again on the next run.
+            journal.cancel(paths[index])
+        else:
+            journal.finish(paths[index], result)
+        finished[index] = result
+
+    def submit(index: int) -> None:
+        path = paths[index]
+        attempts = journal.attempts.get(path, 0)
+        if attempts >= max_attempts:
+            record(index, {"path": path, "status": "FAILED",
+                           "reason": f"Gave up after {attempts} attempts: the worker crashed on each one"})
+            return
+        journal.start(path)
+        in_flight[pool.submit(parse_file, path, *parse_args)] = index
+
+    pool = new_pool()
+    next_index = 0
+    try:
+        while next_index < len(paths):
+            if next_index in replayed:
+                result = journal.result(replayed.pop(next_index))
+                result["path"] = paths[next_index]
+                yield result
+                next_index += 1
+                continue
+            if next_index in finished:
+                yield finished.pop(next_index)
+                next_index += 1
+                continue
+
+            if suspects:
+                if not in_flight:
+                    submit(suspects.popleft())
+            else:
+                while todo and len(in_flight) < workers * 2 and todo[0] < next_index + REORDER_WINDOW:
+                    submit(todo.popleft())
+            if not in_flight:
+                continue
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            crashed = []
+            for future in done:
+                index = in_flight.pop(future)
+                try:
+                    record(index, future.result())
+                except BrokenProcessPool:
+                    crashed.append(index)
+                except Exception as e:
+                    record(index, {"path": paths[index], "status": "FAILED", "reason": f"Worker crashed: {e}"})
+            if crashed:
+                # Everything else in flight went down with the pool.
+                crashed.extend(in_flight.values())
+                in_flight.clear()
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = new_pool()
+                suspects.extend(sorted(crashed))
+    finally:
+        # Stopped early (interrupted, or the caller gave up): these did not crash.
+        for index in in_flight.values():
+            journal.cancel(paths[index])
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct * len(ordered) / 100.0))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class BatchStats:
+    """Running totals for the end-of-run summary."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.latencies_ms: List[float] = []
+        self.total = 0
+        self.failures = 0
+        self.llm_fallbacks = 0
+        self.resumed = 0
+        self.resumed_failures = 0
+
+    def add(self, result: Dict[str, Any]) -> None:
+        REGISTRY.observe_result(result)
+        self.total += 1
+        if result.get("status") != "SUCCESS":
+            self.failures += 1
+        if result.get("extraction_method") == "RegEx/LLM Fallback":
+            self.llm_fallbacks += 1
+        if "elapsed_ms" in result:
+            self.latencies_ms.append(result["elapsed_ms"])
+
+    def resume(self, result: Dict[str, Any]) -> None:
+        """A result replayed from the job journal: counted, but kept out of timings and metrics."""
+        self.resumed += 1
+        if result.get("status") != "SUCCESS":
+            self.resumed_failures += 1
+
+    def summary(self) -> Dict[str, Any]:
+        wall = time.perf_counter() - self.started
+        return {
+            "documents": self.total,
+            "failures": self.failures,
+            "llm_fallbacks": self.llm_fallbacks,
+            "wall_seconds": round(wall, 3),
+            "docs_per_second": round(self.total / wall, 2) if wall > 0 else 0.0,
+            "p50_ms": percentile(self.latencies_ms, 50),
+            "p95_ms": percentile(self.latencies_ms, 95),
+        }
+
+
+class ResultWriter:
+    """Streams results to JSONL or CSV, flushing after every row."""
+
+    def __init__(self, out: TextIO, fmt: str = "jsonl", header: bool = True):
+        self.out = out
+        self.fmt = fmt
+        self.csv_writer = None
+        if fmt == "csv":
+            self.csv_writer = csv.DictWriter(out, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+            if header:
+                self.csv_writer.writeheader()
+
+    def write(self, result: Dict[str, Any]) -> None:
+        if self.csv_writer is not None:
+            self.csv_writer.writerow(result)
+        else:
+            self.out.write(json.dumps(result, ensure_ascii=False) + "\n")
+        self.out.flush()
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    arg_parser = argparse.ArgumentParser(description="Batch-parse a directory or glob of credit card statements.")
+    arg_parser.add_argument("target", help="Directory (searched recursively) or glob pattern of PDFs")
+    arg_parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+    arg_parser.add_argument("-f", "--format", choices=["jsonl", "csv"], default="jsonl")
+    arg_parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(),
+                            help="Worker processes (default: all cores)")
+    arg_parser.add_argument("--text-cache", help="Path of a TextCache database to reuse extracted text")
+    arg_parser.add_argument("--pdf-mode", choices=PDF_MODES, default=PDF_MODE,
+                            help="PDF text backend: pdfplumber, the fast engine, or fast with a pdfplumber retry on a miss")
+    arg_parser.add_argument("--layout-hints", action=argparse.BooleanOptionalAction, default=LAYOUT_HINTS_ENABLED,
+                            help="Extract the hinted header and summary page regions first; read whole pages only "
+                                 "on a miss (default: CREDITCARD_INTEL_LAYOUT_HINTS)")
+    arg_parser.add_argument("--include-raw-text", action="store_true")
+    arg_parser.add_argument("--transactions", action="store_true",
+                            help="Also extract each statement's transaction rows")
+    arg_parser.add_argument("--parquet-dir", help="Append results (and transactions) to partitioned Parquet datasets here")
+    arg_parser.add_argument("--parquet-flush", type=int, default=None, metavar="DOCS",
+                            help="Write Parquet files every this many documents (default: 500)")
+    arg_parser.add_argument("--no-llm", action="store_true", help="Disable the Gemini fallback")
+    arg_parser.add_argument("--metrics-file", help="Write Prometheus text-format metrics here at the end")
+    arg_parser.add_argument("--metrics-port", type=int, help="Serve live Prometheus metrics on this port")
+    return arg_parser
+
+
+def main(argv: List[str] = None) -> int:
+    arg_parser = build_arg_parser()
+    arg_parser.add_argument("--job-id", help="Journal progress under this ID; rerunning with the same ID "
+                                             "skips finished documents and writes results in input order")
+    arg_parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS,
+                            help=f"With --job-id, give up on a document after this many crashed parses "
+                                 f"(default: {MAX_ATTEMPTS})")
+    args = arg_parser.parse_args(argv)
+    api_key = None if args.no_llm else os.environ.get("GEMINI_API_KEY")
+
+    paths = discover_files(args.target)
+    if not paths:
+        print(f"No PDF files found for {args.target}", file=sys.stderr)
+        return 1
+
+    if args.metrics_port:
+        serve_metrics(args.metrics_port)
+
+    exporter = None
+    if args.parquet_dir:
+        try:
+            from parquet_export import FLUSH_DOCUMENTS, ParquetExporter
+            exporter = ParquetExporter(args.parquet_dir, args.parquet_flush or FLUSH_DOCUMENTS)
+        except ImportError as e:
+            print(f"Parquet export unavailable: {e}", file=sys.stderr)
+            return 1
+
+    journal = None
+    if args.job_id:
+        try:
+            journal = JobJournal(args.job_id)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 1
+
+    out = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    stats = BatchStats()
+    # Paths buffered in the exporter but not yet written; the journal marks
+    # them exported once they are, so a resumed job does not export them twice.
+    unflushed: List[str] = []
+    results = None
+    try:
+        writer = ResultWriter(out, args.format)
+        if journal is not None:
+            results = run_job(paths, journal, args.workers, api_key, args.include_raw_text, args.text_cache,
+                              args.pdf_mode, args.layout_hints, args.transactions, args.max_attempts)
+        else:
+            results = run_batch(paths, args.workers, api_key, args.include_raw_text, args.text_cache,
+                                args.pdf_mode, args.layout_hints, args.transactions)
+        for result in results:
+            # run_job bumps journal.replayed just before yielding a replayed result.
+            if journal is not None and journal.replayed > stats.resumed:
+                stats.resume(result)
+            else:
+                stats.add(result)
+            if exporter is not None and (journal is None or result["path"] not in journal.exported):
+                written = exporter.documents_written
+                exporter.write(result)
+                unflushed.append(result["path"])
+                if journal is not None and exporter.documents_written != written:
+                    journal.mark_exported(unflushed)
+                    unflushed = []
+            writer.write(result)
+    finally:
+        if results is not None:
+            results.close()
+        if exporter is not None:
+            exporter.close()
+        if journal is not None:
+            if exporter is not None:
+                journal.mark_exported(unflushed)
+            journal.close()
+        if out is not sys.stdout:
+            out.close()
+
+    summary = stats.summary()
+    if journal is not None:
+        summary["resumed"] = stats.resumed
+    print(json.dumps(summary), file=sys.stderr)
+    if args.metrics_file:
+        REGISTRY.write_prometheus(args.metrics_file)
+    return 0 if stats.failures + stats.resumed_failures < stats.total + stats.resumed else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
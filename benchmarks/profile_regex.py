@@ -0,0 +1,169 @@
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+from typing import Dict, Any, List, Iterator, Tuple
+from template_compiler import COMPILED_TEMPLATES, PATTERN_TIME_BUDGET_MS, REGEX_ENGINE, engine_report
+from benchmarks.synthetic import generate_statement_pages, statement_text
+
+LITERAL_WORD = re.compile(r"(?<![\\(?])\b[A-Za-z]{3,}\b")
+WORST_INPUTS = 3
+
+
+def iter_text_files(target: str) -> Iterator[Tuple[str, str]]:
+    """Yields (name, text) for a directory of .txt files or a glob pattern."""
+    paths = sorted(glob.glob(os.path.join(target, "**", "*.txt"), recursive=True)) if os.path.isdir(target) \
+        else sorted(glob.glob(target, recursive=True))
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            yield path, f.read()
+
+
+def iter_text_cache(path: str) -> Iterator[Tuple[str, str]]:
+    from text_cache import TextCache
+    for key, text in TextCache(path).iter_texts():
+        yield f"text-cache:{key[:12]}", text
+
+
+def iter_synthetic(pages: int, transactions: int, seed: int) -> Iterator[Tuple[str, str]]:
+    for bank_key in COMPILED_TEMPLATES:
+        page_lines, _ = generate_statement_pages(bank_key, pages, transactions, seed)
+        yield f"synthetic:{bank_key}", statement_text(page_lines)
+
+
+def near_miss_text(pattern_str: str, repeats: int) -> str:
+    """
+    Repeats the pattern's literal words without the value that should follow
+    them. Lazy `.*?` and `\\s*` runs that start at every repetition have to
+    scan ahead and give up, which is where backtracking cost shows up.
+    """
+    words = LITERAL_WORD.findall(pattern_str)
+    if not words:
+        return ""
+    return (" ".join(words) + " : \n") * repeats
+
+
+def iter_stress(repeats: int) -> Iterator[Tuple[str, str]]:
+    seen = set()
+    for fields in COMPILED_TEMPLATES.values():
+        for matcher in fields.values():
+            for pattern_str in matcher.pattern_strs:
+                text = near_miss_text(pattern_str, repeats)
+                if text and text not in seen:
+                    seen.add(text)
+                    yield f"stress:{text[:40].strip()!r}", text
+
+
+def profile_patterns(corpus: List[Tuple[str, str]], repeat: int = 1) -> List[Dict[str, Any]]:
+    """
+    Times every compiled template pattern (and each field's merged gate)
+    against every corpus text. Uses the plain compiled patterns, so the
+    numbers show true cost rather than the budget-capped runtime path.
+    """
+    rows = []
+    for bank_key, fields in COMPILED_TEMPLATES.items():
+        for field, matcher in fields.items():
+            entries = [(str(i), p) for i, p in zip(matcher.indices, matcher.patterns)]
+            if matcher.merged is not None:
+                entries.append(("merged", matcher.merged))
+            for index, budgeted in entries:
+                pattern = budgeted.pattern
+                total_ms = 0.0
+                matches = 0
+                samples: List[Tuple[float, str]] = []
+                for name, text in corpus:
+                    best = None
+                    for _ in range(repeat):
+                        start = time.perf_counter()
+                        found = pattern.search(text)
+                        elapsed = (time.perf_counter() - start) * 1000
+                        best = elapsed if best is None else min(best, elapsed)
+                    total_ms += best
+                    matches += 1 if found else 0
+                    samples.append((best, name))
+                samples.sort(reverse=True)
+                rows.append({
+                    "bank": bank_key,
+                    "field": field,
+                    "pattern_index": index,
+                    "engine": budgeted.engine,
+                    "pattern": pattern.pattern,
+                    "searches": len(corpus),
+                    "matches": matches,
+                    "match_rate": round(matches / len(corpus), 4) if corpus else 0.0,
+                    "total_ms": round(total_ms, 4),
+                    "mean_ms": round(total_ms / len(corpus), 4) if corpus else 0.0,
+                    "max_ms": round(samples[0][0], 4) if samples else 0.0,
+                    "over_budget": sum(1 for ms, _ in samples if ms > PATTERN_TIME_BUDGET_MS),
+                    "worst_inputs": [{"input": name, "ms": round(ms, 4)} for ms, name in samples[:WORST_INPUTS]],
+                })
+    rows.sort(key=lambda row: row["max_ms"], reverse=True)
+    return rows
+
+
+def print_table(rows: List[Dict[str, Any]], top: int) -> None:
+    print(f"{'bank':6s} {'field':20s} {'idx':>6s} {'engine':>6s} {'match%':>7s} {'mean ms':>10s} {'max ms':>10s} {'over':>5s}  worst input",
+          file=sys.stderr)
+    for row in rows[:top]:
+        worst = row["worst_inputs"][0]["input"] if row["worst_inputs"] else ""
+        print(f"{row['bank']:6s} {row['field']:20s} {row['pattern_index']:>6s} {row['engine']:>6s} {row['match_rate'] * 100:6.1f}% "
+              f"{row['mean_ms']:10.4f} {row['max_ms']:10.4f} {row['over_budget']:5d}  {worst}", file=sys.stderr)
+
+
+def main(argv: List[str] = None) -> int:
+    arg_parser = argparse.ArgumentParser(description="Per-pattern cost profile of the regex templates.")
+    arg_parser.add_argument("--texts", action="append", default=[], help="Directory or glob of extracted .txt files")
+    arg_parser.add_argument("--text-cache", help="Profile against every text stored in this TextCache database")
+    arg_parser.add_argument("--synthetic", action="store_true", help="Add one synthetic statement per bank")
+    arg_parser.add_argument("--pages", type=int, default=10)
+    arg_parser.add_argument("--transactions", type=int, default=400)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--stress", type=int, default=0, metavar="REPEATS",
+                            help="Add near-miss inputs repeating each pattern's literal words this many times")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="Keep the best of this many timings per search")
+    arg_parser.add_argument("--top", type=int, default=20, help="Rows to print in the summary table")
+    arg_parser.add_argument("-o", "--output", help="Write the JSON report here (default: stdout)")
+    arg_parser.add_argument("--engines", action="store_true",
+                            help="Only report which engine (re2, regex, re, or none if it does not compile) runs each pattern, and why")
+    args = arg_parser.parse_args(argv)
+
+    if args.engines:
+        rows = engine_report()
+        print(json.dumps({"regex_engine": REGEX_ENGINE, "patterns": rows}, indent=2))
+        for row in rows:
+            print(f"{row['bank']:6s} {row['field']:20s} {row['pattern_index']:>6s} {row['engine']:>5s}  "
+                  f"{row['fallback_reason']}", file=sys.stderr)
+        return 0
+
+    corpus: List[Tuple[str, str]] = []
+    for target in args.texts:
+        corpus.extend(iter_text_files(target))
+    if args.text_cache:
+        corpus.extend(iter_text_cache(args.text_cache))
+    if args.synthetic or not corpus and not args.stress:
+        corpus.extend(iter_synthetic(args.pages, args.transactions, args.seed))
+    if args.stress:
+        corpus.extend(iter_stress(args.stress))
+
+    rows = profile_patterns(corpus, max(1, args.repeat))
+    report = {
+        "budget_ms": PATTERN_TIME_BUDGET_MS,
+        "regex_engine": REGEX_ENGINE,
+        "corpus": [{"input": name, "chars": len(text)} for name, text in corpus],
+        "patterns": rows,
+    }
+    data = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(data + "\n")
+    else:
+        print(data)
+    print_table(rows, args.top)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
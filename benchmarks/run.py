@@ -0,0 +1,210 @@
+import argparse
+import io
+import json
+import platform
+import re
+import statistics
+import sys
+import time
+from typing import Callable, Dict, Any, List
+from parser import (
+    KEYS_TO_SEARCH, PARSER_VERSION, clean_amount, extract_fields, extract_hdfc_total_dues,
+    extract_idfc_amounts, extract_text_from_pdf, identify_bank, parse_text,
+)
+from regex_patterns import REGEX_TEMPLATES
+from pdf_backends import ACCURATE_BACKEND, PDF_BACKENDS
+from transactions import iter_transactions_from_pages
+from benchmarks.synthetic import AMOUNT_SAMPLES, LAYOUT_VARIANTS, generate_statement_pages, render_pdf, statement_text
+
+try:
+    import pandas as pd
+    from normalize import AMOUNT_SCALE, _scalar_units, amounts_to_fixed_point, clean_amounts
+except ImportError:
+    pd = None
+
+AMOUNT_TOKEN = re.compile(r"[\d,]+\.\d{2}\s*(?:Dr|Cr)?")
+
+
+def time_stage(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Runs fn `repeat` times and returns min/median/mean/p95 wall time in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    ordered = sorted(samples)
+    return {
+        "repeat": repeat,
+        "min_ms": round(ordered[0], 4),
+        "median_ms": round(statistics.median(ordered), 4),
+        "mean_ms": round(statistics.fmean(ordered), 4),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(round(0.95 * len(ordered))) - 1)], 4),
+    }
+
+
+def benchmark_bank(bank_key: str, pages: int, transactions: int, repeat: int, seed: int,
+                   skip_pdf: bool) -> Dict[str, Any]:
+    page_lines, expected = generate_statement_pages(bank_key, pages, transactions, seed)
+    stages: Dict[str, Dict[str, float]] = {}
+    backend_accuracy: Dict[str, Dict[str, bool]] = {}
+
+    if skip_pdf:
+        text = statement_text(page_lines)
+    else:
+        pdf_bytes = render_pdf(page_lines)
+        text = extract_text_from_pdf(io.BytesIO(pdf_bytes))
+        stages["extract_text_from_pdf"] = time_stage(
+            lambda: extract_text_from_pdf(io.BytesIO(pdf_bytes)), max(1, repeat // 10)
+        )
+        for backend in PDF_BACKENDS:
+            if backend == ACCURATE_BACKEND:
+                continue
+            stages[f"extract_text_{backend}"] = time_stage(
+                lambda: extract_text_from_pdf(io.BytesIO(pdf_bytes), backend=backend), max(1, repeat // 10)
+            )
+            backend_text = extract_text_from_pdf(io.BytesIO(pdf_bytes), backend=backend)
+            backend_found = extract_fields(backend_text, bank_key, KEYS_TO_SEARCH)
+            backend_accuracy[backend] = {key: backend_found.get(key) == expected[key] for key in KEYS_TO_SEARCH}
+
+    stages["identify_bank"] = time_stage(lambda: identify_bank(text), repeat)
+    stages["regex_fields"] = time_stage(lambda: extract_fields(text, bank_key, KEYS_TO_SEARCH), repeat)
+    if bank_key == "hdfc":
+        stages["extract_hdfc_total_dues"] = time_stage(lambda: extract_hdfc_total_dues(text), repeat)
+    if bank_key == "idfc":
+        stages["extract_idfc_amounts"] = time_stage(lambda: extract_idfc_amounts(text), repeat)
+
+    stages["parse_text"] = time_stage(lambda: parse_text(text), repeat)
+
+    page_texts = [statement_text([lines]) for lines in page_lines]
+    stages["transactions"] = time_stage(lambda: sum(1 for _ in iter_transactions_from_pages(page_texts, bank_key)), repeat)
+    transaction_rows = sum(1 for _ in iter_transactions_from_pages(page_texts, bank_key))
+
+    amounts = AMOUNT_TOKEN.findall(text) + AMOUNT_SAMPLES
+    stages["clean_amount"] = time_stage(lambda: [clean_amount(a) for a in amounts], repeat)
+    stages["clean_amount"]["values"] = len(amounts)
+    amount_parity = fixed_point_parity = None
+    if pd is not None:
+        column = pd.Series(amounts)
+        stages["clean_amounts_column"] = time_stage(lambda: clean_amounts(column), repeat)
+        stages["clean_amounts_column"]["values"] = len(amounts)
+        amount_parity = clean_amounts(column).tolist() == [clean_amount(a) for a in amounts]
+        fixed_point_parity = amounts_to_fixed_point(column).tolist() == [_scalar_units(a, AMOUNT_SCALE) for a in amounts]
+
+    identified = identify_bank(text)
+    found = extract_fields(text, bank_key, KEYS_TO_SEARCH)
+    variant_accuracy = {}
+    for variant in LAYOUT_VARIANTS.get(bank_key, []):
+        variant_lines, variant_expected = generate_statement_pages(bank_key, pages, transactions, seed, variant)
+        variant_found = extract_fields(statement_text(variant_lines), bank_key, KEYS_TO_SEARCH)
+        variant_accuracy[variant] = {key: variant_found.get(key) == variant_expected[key] for key in KEYS_TO_SEARCH}
+    return {
+        "pages": len(page_lines),
+        "transactions": transactions,
+        "transaction_rows": transaction_rows,
+        "text_chars": len(text),
+        "identified_bank": identified,
+        "accuracy": {key: found.get(key) == expected[key] for key in KEYS_TO_SEARCH},
+        "backend_accuracy": backend_accuracy,
+        "variant_accuracy": variant_accuracy,
+        "amount_parity": amount_parity,
+        "fixed_point_parity": fixed_point_parity,
+        "stages": stages,
+    }
+
+
+def run(banks: List[str], pages: int, transactions: int, repeat: int, seed: int, skip_pdf: bool) -> Dict[str, Any]:
+    try:
+        import pdfplumber
+        pdfplumber_version = getattr(pdfplumber, "__version__", "unknown")
+    except ImportError:
+        pdfplumber_version = None
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "parser_version": PARSER_VERSION,
+            "pdfplumber": pdfplumber_version,
+        },
+        "config": {"pages": pages, "transactions": transactions, "repeat": repeat, "seed": seed, "skip_pdf": skip_pdf},
+        "results": {
+            bank_key: benchmark_bank(bank_key, pages, transactions, repeat, seed, skip_pdf)
+            for bank_key in banks
+        },
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Returns one line per stage whose median slowed down by more than `threshold` (a ratio)."""
+    regressions = []
+    for bank_key, result in current["results"].items():
+        old_stages = baseline.get("results", {}).get(bank_key, {}).get("stages", {})
+        for stage, stats in result["stages"].items():
+            old = old_stages.get(stage)
+            if not old or not old.get("median_ms"):
+                continue
+            ratio = stats["median_ms"] / old["median_ms"]
+            line = f"{bank_key:6s} {stage:26s} {old['median_ms']:10.4f} -> {stats['median_ms']:10.4f} ms  x{ratio:.2f}"
+            print(line, file=sys.stderr)
+            if ratio > threshold:
+                regressions.append(line)
+    return regressions
+
+
+def check(report: Dict[str, Any]) -> List[str]:
+    """
+    Returns one line per hard failure: a LAYOUT_VARIANTS regression case
+    that extracts a wrong field, or a column amount cleaner that disagrees
+    with its scalar version (parity is None when pandas is missing).
+    """
+    failures = []
+    for bank_key, result in report["results"].items():
+        if result["amount_parity"] is False:
+            failures.append(f"{bank_key}: clean_amounts differs from clean_amount")
+        if result["fixed_point_parity"] is False:
+            failures.append(f"{bank_key}: amounts_to_fixed_point differs from _scalar_units")
+        for variant, accuracy in result["variant_accuracy"].items():
+            wrong = [key for key, ok in accuracy.items() if not ok]
+            if wrong:
+                failures.append(f"{bank_key} layout variant '{variant}' extracts wrong {', '.join(wrong)}")
+    return failures
+
+
+def main(argv: List[str] = None) -> int:
+    arg_parser = argparse.ArgumentParser(description="Stage-level benchmarks on synthetic statements.")
+    arg_parser.add_argument("--banks", nargs="+", default=list(REGEX_TEMPLATES.keys()), choices=list(REGEX_TEMPLATES.keys()))
+    arg_parser.add_argument("--pages", type=int, default=10)
+    arg_parser.add_argument("--transactions", type=int, default=400)
+    arg_parser.add_argument("--repeat", type=int, default=50)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--skip-pdf", action="store_true", help="Benchmark the text stages only")
+    arg_parser.add_argument("-o", "--output", help="Write the JSON report here (default: stdout)")
+    arg_parser.add_argument("--compare", help="Baseline JSON report to compare medians against")
+    arg_parser.add_argument("--fail-over", type=float, default=1.25,
+                            help="With --compare, exit 1 if any median is this many times slower")
+    args = arg_parser.parse_args(argv)
+
+    report = run(args.banks, args.pages, args.transactions, args.repeat, args.seed, args.skip_pdf)
+    data = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(data + "\n")
+    else:
+        print(data)
+
+    failures = check(report)
+    for line in failures:
+        print(line, file=sys.stderr)
+    if failures:
+        return 1
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.fail_over):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+import random
+from typing import Dict, List, Tuple
+
+LINES_PER_PAGE = 60
+
+MERCHANTS = [
+    "AMAZON PAY INDIA", "SWIGGY BANGALORE", "ZOMATO LTD", "FLIPKART INTERNET", "UBER INDIA",
+    "BIG BAZAAR PUNE", "INDIAN OIL PETROL", "BOOKMYSHOW MUMBAI", "MAKEMYTRIP NEW DELHI",
+    "APOLLO PHARMACY", "RELIANCE DIGITAL", "IRCTC ONLINE", "NETFLIX COM", "DMART HYDERABAD",
+]
+
+
+# Amount strings as banks and the LLM print them, including malformed ones;
+# the scalar and column amount cleaners must agree on all of them.
+AMOUNT_SAMPLES = [
+    "22,935.00", "22935.00", "22.935,00", "1,23,456.78", "Rs. 1,234.50", "Rs.1,234.50", "INR 999",
+    "\u20b9 12,000.00", "` 4,500.25", "4,500.25 Dr", "4,500.25 CR", "0.00", "0", ".50", "12.", "1.2.3",
+    "12.3.", "..", "-1,200.00", "(1,200.00)", "NOT_FOUND", "", " ", "abc", "1 234,56", "12,34,567.891",
+    "\u00a0250.00\u00a0", "Total 1,000.00 Cr", "99.995", "0.005", "1234567890123456.00",
+]
+
+
+# Alternative page-1 layouts kept as regression cases, per bank.
+#   split_summary: the minimum due sits next to the payment due date and the
+#   total is printed further down, outside that region, so a generic
+#   "Amount Due" pattern would grab the minimum if region order beat
+#   pattern priority.
+LAYOUT_VARIANTS = {
+    "axis": ["split_summary"],
+}
+
+
+def _money(value: float) -> str:
+    return f"{value:,.2f}"
+
+
+def _summary_lines(bank_key: str, fields: Dict[str, str], variant: str = None) -> List[str]:
+    """Page-1 header and summary box laid out the way each bank prints it (or a LAYOUT_VARIANTS variant)."""
+    card = fields["card_last_4_digits"]
+    total = fields["total_due_printed"]
+    minimum = fields["min_payment_printed"]
+    stmt = fields["statement_date"]
+    due = fields["payment_due_date"]
+    period_start = fields["period_start"]
+
+    if bank_key == "hdfc":
+        return [
+            "HDFC BANK Credit Card Statement",
+            f"Card No: 4321 12XX XXXX {card}",
+            f"Statement Date : {stmt}",
+            f"Payment Due Date : {due}",
+            "Account Summary",
+            "Opening Balance Payment/Credits Purchase/Debits Finance Charges",
+            f"8,120.00 8,120.00 {total} 0.00",
+            f"Total Dues {total}",
+            f"Minimum Amount Due {minimum}",
+        ]
+    if bank_key == "axis" and variant == "split_summary":
+        return [
+            "FLIPKART AXIS BANK CREDIT CARD",
+            f"Credit Card Number : 5123 45XX XXXX {card}",
+            f"Statement Generation Date : {stmt}",
+            f"Payment Due Date : {due}",
+            f"Minimum Amount Due : {minimum}",
+        ] + [f"Reward points earned on offer category {i}: see terms and conditions" for i in range(20)] + [
+            f"Total Payment Due : {total}",
+        ]
+    if bank_key == "axis":
+        return [
+            "FLIPKART AXIS BANK CREDIT CARD",
+            f"Credit Card Number : 5123 45XX XXXX {card}",
+            f"Statement Generation Date : {stmt}",
+            f"Payment Due Date : {due}",
+            f"Total Payment Due : {total}",
+            f"Minimum Amount Due : {minimum}",
+        ]
+    if bank_key == "icici":
+        return [
+            "ICICI BANK CREDIT CARD STATEMENT",
+            f"Card Number : 4375 XXXX XXXX {card}",
+            f"Statement Date : {stmt}",
+            f"Payment Due Date : {due}",
+            f"Your Total Amount Due : {total}",
+            f"Minimum Amount Due : {minimum}",
+        ]
+    if bank_key == "idfc":
+        return [
+            "IDFC FIRST BANK",
+            f"Credit Card Statement {period_start} - {stmt}",
+            f"Card Number : XXXX XXXX XXXX {card}",
+            "STATEMENT SUMMARY",
+            "Total Amount Due",
+            f"` {total}",
+            "Minimum Amount Due",
+            f"` {minimum}",
+            "Payment Due Date",
+            due,
+        ]
+    if bank_key == "yes":
+        return [
+            "YES BANK CREDIT CARD STATEMENT",
+            f"Card Number : XXXX XXXX XXXX {card}",
+            f"Statement Date : {stmt}",
+            f"Payment Due Date : {due}",
+            f"Total Dues : {total}",
+            f"Minimum Amount Due : {minimum}",
+        ]
+    raise ValueError(f"No synthetic layout for bank '{bank_key}'" + (f" variant '{variant}'" if variant else ""))
+
+
+def generate_statement_pages(bank_key: str, pages: int = 3, transactions: int = 120,
+                             seed: int = 0, variant: str = None) -> Tuple[List[List[str]], Dict[str, str]]:
+    """
+    Returns (pages_of_lines, expected_fields) for a synthetic statement.
+    Transactions are spread over the pages after the summary; `pages` is a
+    minimum and grows when the transactions do not fit. `variant` picks one
+    of the bank's LAYOUT_VARIANTS for page 1.
+    """
+    rng = random.Random(f"{bank_key}:{seed}")
+    total = round(rng.uniform(1500, 95000), 2)
+    minimum = round(max(200.0, total * 0.05), 2)
+    day = rng.randint(1, 27)
+    fields = {
+        "statement_date": f"{day:02d}/03/2024",
+        "payment_due_date": f"{day:02d}/04/2024",
+        "period_start": f"{day + 1:02d}/02/2024",
+        "card_last_4_digits": f"{rng.randint(0, 9999):04d}",
+        "total_due_printed": _money(total),
+        "min_payment_printed": _money(minimum),
+    }
+    expected = {
+        "statement_date": fields["statement_date"],
+        "payment_due_date": fields["payment_due_date"],
+        "total_due": f"{total:.2f}",
+        "min_payment": f"{minimum:.2f}",
+        "card_last_4_digits": fields["card_last_4_digits"],
+    }
+
+    result: List[List[str]] = [_summary_lines(bank_key, fields, variant)]
+    rows = []
+    for _ in range(transactions):
+        merchant = rng.choice(MERCHANTS)
+        amount = _money(rng.uniform(50, 25000))
+        suffix = "Cr" if rng.random() < 0.08 else "Dr"
+        rows.append(f"{rng.randint(1, 28):02d}/02/2024 {merchant} {amount} {suffix}")
+
+    if pages == 1:
+        room = LINES_PER_PAGE - len(result[0]) - 1
+        result[0] += ["Transaction Details"] + rows[:room]
+        rows = rows[room:]
+    if rows:
+        per_page = LINES_PER_PAGE - 1
+        if pages > 1:
+            per_page = min(per_page, -(-len(rows) // (pages - 1)))
+        for start in range(0, len(rows), per_page):
+            result.append(["Transaction Details"] + rows[start:start + per_page])
+    while len(result) < pages:
+        result.append(["Important Information", "This page intentionally left blank."])
+    return result, expected
+
+
+def statement_text(pages: List[List[str]]) -> str:
+    """The text the parser would see for these pages (one line per row, PAGE_BREAK between pages)."""
+    return "\f\n".join("\n".join(lines) + "\n" for lines in pages)
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def render_pdf(pages: List[List[str]]) -> bytes:
+    """Writes a minimal, valid PDF (Helvetica, one text object per page) with no dependencies."""
+    objects: List[Tuple[int, bytes]] = []
+    page_ids = []
+    font_id = 3
+    next_id = 4
+    for lines in pages:
+        content = ["BT", "/F1 9 Tf", "11 TL", "36 806 Td"]
+        for line in lines:
+            content.append(f"({_pdf_escape(line)}) Tj T*")
+        content.append("ET")
+        stream = "\n".join(content).encode("latin-1", "replace")
+        content_id, page_id = next_id, next_id + 1
+        next_id += 2
+        objects.append((content_id, b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"))
+        objects.append((page_id, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode("ascii")))
+        page_ids.append(page_id)
+
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+    objects = [
+        (1, b"<< /Type /Catalog /Pages 2 0 R >>"),
+        (2, f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode("ascii")),
+        (3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"),
+    ] + objects
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = {}
+    for obj_id, body in objects:
+        offsets[obj_id] = len(out)
+        out += f"{obj_id} 0 obj\n".encode("ascii") + body + b"\nendobj\n"
+    xref_at = len(out)
+    size = max(offsets) + 1
+    out += f"xref\n0 {size}\n".encode("ascii") + b"0000000000 65535 f \n"
+    for obj_id in range(1, size):
+        out += f"{offsets[obj_id]:010d} 00000 n \n".encode("ascii")
+    out += f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref_at}\n%%EOF\n".encode("ascii")
+    return bytes(out)
+
+
+def generate_statement_pdf(bank_key: str, pages: int = 3, transactions: int = 120,
+                           seed: int = 0, variant: str = None) -> Tuple[bytes, Dict[str, str]]:
+    """Returns (pdf_bytes, expected_fields) for a synthetic statement."""
+    page_lines, expected = generate_statement_pages(bank_key, pages, transactions, seed, variant)
+    return render_pdf(page_lines), expected
@@ -0,0 +1,23 @@
+import hashlib
+import os
+import sqlite3
+
+CACHE_DIR = os.environ.get("CREDITCARD_INTEL_CACHE_DIR", ".cache")
+
+
+def sha256_hex(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def evict_lru(conn: sqlite3.Connection, table: str, max_entries: int, max_bytes: int) -> None:
+    """Deletes least-recently-accessed rows until the table fits both limits."""
+    count, total = conn.execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {table}").fetchone()
+    if count <= max_entries and total <= max_bytes:
+        return
+    rows = conn.execute(f"SELECT key, size FROM {table} ORDER BY accessed ASC").fetchall()
+    for key, size in rows:
+        if count <= max_entries and total <= max_bytes:
+            break
+        conn.execute(f"DELETE FROM {table} WHERE key = ?", (key,))
+        count -= 1
+        total -= size
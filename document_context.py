@@ -0,0 +1,81 @@
+import re
+from functools import cached_property
+from itertools import islice
+from typing import Any, Callable, Dict, List, Pattern, Tuple
+from bank_classifier import BANK_CLASSIFIER
+
+# Headings and labels the bank helpers key off. A pattern that starts with
+# one of these cannot match before its first occurrence, and cannot match at
+# all when it is absent.
+ANCHOR_PATTERNS = {
+    "account_summary": r"ACCOUNT\s+SUMMARY",
+    "statement_summary": r"STATEMENT\s+SUMMARY",
+    "total_dues": r"TOTAL\s+DUES",
+    "total_amount_due": r"TOTAL\s+AMOUNT\s+DUE",
+    "minimum_amount_due": r"MINIMUM\s+AMOUNT\s+DUE",
+    "payment_due_date": r"PAYMENT\s+DUE\s+DATE",
+}
+COMPILED_ANCHORS: Dict[str, Pattern] = {name: re.compile(p) for name, p in ANCHOR_PATTERNS.items()}
+COMPILED_ANCHORS_IGNORECASE: Dict[str, Pattern] = {
+    name: re.compile(p, re.IGNORECASE) for name, p in ANCHOR_PATTERNS.items()
+}
+
+
+class DocumentContext:
+    """
+    Derived data for one statement text, computed on first use and kept
+    for the life of one parse: the upper-cased text, the identified bank,
+    anchor positions and memoized helper outputs.
+    """
+
+    def __init__(self, text: str):
+        self.text = text or ""
+        # Anchor name -> (positions, whether the scan reached the end of the text).
+        self._anchors: Dict[str, Tuple[List[int], bool]] = {}
+        self._memo: Dict[str, Any] = {}
+
+    @cached_property
+    def upper(self) -> str:
+        return self.text.upper()
+
+    @cached_property
+    def bank_key(self) -> str:
+        if not self.text:
+            return "unknown"
+        return BANK_CLASSIFIER.classify(self.upper, folded=True)
+
+    def _anchor_scan(self, name: str) -> Tuple[Pattern, str]:
+        # Scanning the upper-cased text case-sensitively is ~9x faster than
+        # IGNORECASE, but upper() changes the length of a few characters
+        # (e.g. "ß") and leaves "\u0130", which IGNORECASE matches to "I",
+        # alone; fall back to IGNORECASE on the original text for those.
+        if len(self.upper) == len(self.text) and "\u0130" not in self.upper:
+            return COMPILED_ANCHORS[name], self.upper
+        return COMPILED_ANCHORS_IGNORECASE[name], self.text
+
+    def anchors(self, name: str, limit: int = None) -> List[int]:
+        """
+        Start offsets of the named anchor's occurrences, in order. With a
+        limit the scan stops after that many, so callers that only need the
+        first few hits do not pay for a pass over the whole text.
+        """
+        cached = self._anchors.get(name)
+        if cached is None or (not cached[1] and (limit is None or len(cached[0]) < limit)):
+            pattern, text = self._anchor_scan(name)
+            matches = pattern.finditer(text)
+            if limit is not None:
+                matches = islice(matches, limit)
+            positions = [m.start() for m in matches]
+            cached = self._anchors[name] = (positions, limit is None or len(positions) < limit)
+        return cached[0] if limit is None else cached[0][:limit]
+
+    def first_anchor(self, name: str) -> int:
+        """Offset of the first occurrence of the named anchor, or -1."""
+        positions = self.anchors(name, 1)
+        return positions[0] if positions else -1
+
+    def memo(self, name: str, compute: Callable[[], Any]) -> Any:
+        """Returns compute() the first time `name` is requested, the stored value after."""
+        if name not in self._memo:
+            self._memo[name] = compute()
+        return self._memo[name]
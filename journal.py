@@ -0,0 +1,147 @@
+import json
+import os
+import re
+import sys
+import time
+from typing import Any, Dict, Iterable, Optional, Set
+from cache_utils import CACHE_DIR, sha256_hex
+
+JOURNAL_DIR = os.path.join(CACHE_DIR, "jobs")
+# A document whose parse has started this many times without finishing (its
+# worker, or the whole run, died each time) is given up on.
+MAX_ATTEMPTS = int(os.getenv("CREDITCARD_INTEL_MAX_ATTEMPTS", "3"))
+# Records reach the OS as soon as they are written, which survives this
+# process crashing; fsync, which also survives a power cut, runs at most
+# this often.
+FSYNC_SECONDS = 1.0
+JOB_ID = re.compile(r"[\w.-]+")
+
+
+class JobJournal:
+    """
+    Append-only JSON-lines journal of one batch job, so a rerun with the same
+    job ID skips the documents already finished. Records:
+        {"event": "start", "path"}      a parse was dispatched
+        {"event": "cancel", "path"}     ...and abandoned without crashing
+        {"event": "done", "path", "size", "mtime_ns", "sha256", "result"}
+        {"event": "exported", "paths"}  these results are in the Parquet output
+    Opening it replays the records: finished results are kept as file
+    offsets rather than in memory, and a start with no done or cancel after
+    it counts as a crashed attempt. A torn last record is cut off.
+    """
+
+    def __init__(self, job_id: str, directory: str = None):
+        if not JOB_ID.fullmatch(job_id):
+            raise ValueError(f"Invalid job ID '{job_id}': use letters, digits, '_', '-' and '.'")
+        directory = directory or JOURNAL_DIR
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{job_id}.jsonl")
+        self.done: Dict[str, Dict[str, Any]] = {}
+        self.attempts: Dict[str, int] = {}
+        self.exported: Set[str] = set()
+        self.replayed = 0
+        self._replay()
+        self.file = open(self.path, "ab")
+        self.reader = open(self.path, "rb")
+        self.synced = time.monotonic()
+
+    def _replay(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        offset = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line) if line.endswith(b"\n") else None
+                except ValueError:
+                    record = None
+                if record is None:
+                    break
+                self._apply(record, offset)
+                offset += len(line)
+        if offset < os.path.getsize(self.path):
+            print(f"Journal {self.path}: dropping a torn record at byte {offset}", file=sys.stderr)
+            with open(self.path, "r+b") as f:
+                f.truncate(offset)
+
+    def _apply(self, record: Dict[str, Any], offset: int) -> None:
+        event, path = record.get("event"), record.get("path")
+        if event == "start":
+            self.attempts[path] = self.attempts.get(path, 0) + 1
+        elif event == "cancel":
+            self.attempts[path] = max(0, self.attempts.get(path, 0) - 1)
+        elif event == "done":
+            self.attempts.pop(path, None)
+            # A re-parse (the file changed) still has to be exported.
+            self.exported.discard(path)
+            self.done[path] = {"offset": offset, "size": record.get("size"),
+                               "mtime_ns": record.get("mtime_ns"), "sha256": record.get("sha256")}
+        elif event == "exported":
+            self.exported.update(record["paths"])
+
+    def _append(self, record: Dict[str, Any]) -> int:
+        offset = self.file.tell()
+        self.file.write(json.dumps(record).encode("utf-8") + b"\n")
+        self.file.flush()
+        if time.monotonic() - self.synced >= FSYNC_SECONDS:
+            os.fsync(self.file.fileno())
+            self.synced = time.monotonic()
+        self._apply(record, offset)
+        return offset
+
+    def start(self, path: str) -> None:
+        self._append({"event": "start", "path": path})
+
+    def cancel(self, path: str) -> None:
+        self._append({"event": "cancel", "path": path})
+
+    def finish(self, path: str, result: Dict[str, Any]) -> None:
+        try:
+            st = os.stat(path)
+            size, mtime_ns = st.st_size, st.st_mtime_ns
+        except OSError:
+            size = mtime_ns = None
+        self._append({"event": "done", "path": path, "size": size, "mtime_ns": mtime_ns,
+                      "sha256": result.get("sha256"), "result": result})
+
+    def mark_exported(self, paths: Iterable[str]) -> None:
+        paths = list(paths)
+        if paths:
+            self._append({"event": "exported", "paths": paths})
+
+    def completed(self, path: str) -> Optional[int]:
+        """
+        Offset of the path's finished result, or None if it still needs
+        parsing. Unchanged size and mtime are trusted; otherwise the file is
+        hashed and counts as finished only if its bytes are the same.
+        """
+        entry = self.done.get(path)
+        if entry is None:
+            return None
+        try:
+            st = os.stat(path)
+            if (st.st_size, st.st_mtime_ns) != (entry["size"], entry["mtime_ns"]):
+                with open(path, "rb") as f:
+                    if sha256_hex(f.read()) != entry["sha256"]:
+                        return None
+        except OSError:
+            return None
+        return entry["offset"]
+
+    def result(self, offset: int) -> Dict[str, Any]:
+        """The result recorded at `offset` (from completed)."""
+        self.reader.seek(offset)
+        self.replayed += 1
+        return json.loads(self.reader.readline())["result"]
+
+    def close(self) -> None:
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        self.reader.close()
+
+    def __enter__(self) -> "JobJournal":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,97 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import closing
+from typing import Dict, Any, Optional
+from cache_utils import CACHE_DIR, evict_lru, sha256_hex
+
+DEFAULT_MAX_ENTRIES = 20000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+
+class LLMResponseCache:
+    """
+    Persistent cache of generateContent response bodies. The key hashes the
+    endpoint and model together with the whole request payload, i.e. the
+    prompt text, the system prompt, the response schema and the generation
+    config, so any change to what is asked, or where, produces a fresh
+    request (answers from a mock server never reach the real one's runs). Entries expire after
+    ttl_seconds and are evicted least-recently-used beyond the size limits.
+    hits/misses count lookups made by this process.
+    """
+
+    def __init__(self, path: str = None, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_BYTES, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        if path is None:
+            path = os.path.join(CACHE_DIR, "llm.sqlite3")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, response TEXT, size INTEGER, created REAL, accessed REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def make_key(model: str, payload: Dict[str, Any], base_url: str = "") -> str:
+        body = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+        return sha256_hex(f"{base_url}\n{model}\n{body}".encode("utf-8"))
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        try:
+            with closing(self._connect()) as conn, conn:
+                row = conn.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None and self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    row = None
+                if row is not None:
+                    conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+        except sqlite3.Error as e:
+            print(f"LLM cache read failed: {e}", file=sys.stderr)
+            row = None
+
+        self._count(row is not None)
+        return json.loads(row[0]) if row is not None else None
+
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        payload = json.dumps(response, ensure_ascii=False)
+        now = time.time()
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                    (key, payload, len(payload), now, now),
+                )
+                if self.ttl_seconds is not None:
+                    conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+                evict_lru(conn, "responses", self.max_entries, self.max_bytes)
+        except sqlite3.Error as e:
+            print(f"LLM cache write failed: {e}", file=sys.stderr)
+
+    def clear(self) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM responses")
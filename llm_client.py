@@ -0,0 +1,152 @@
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from typing import Dict, Any, List, Optional, Tuple, Union
+import requests
+from requests.adapters import HTTPAdapter
+from llm_cache import LLMResponseCache
+
+# Both can be overridden, e.g. GEMINI_BASE_URL=http://127.0.0.1:8765/v1beta for mock_gemini.py.
+GEMINI_MODEL = os.environ.get("GEMINI_MODEL", "gemini-2.5-flash-preview-05-20")
+GEMINI_BASE_URL = os.environ.get("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com/v1beta").rstrip("/")
+API_URL_TEMPLATE = f"{GEMINI_BASE_URL}/models/{GEMINI_MODEL}:generateContent?key="
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class GeminiClient:
+    """
+    Fallback client for the Gemini generateContent endpoint. Keeps a pooled
+    requests.Session so TLS connections are reused, applies connect/read
+    timeouts to every request, and retries 429/5xx and connection errors with
+    exponential backoff (honouring Retry-After). The async methods run the
+    same calls in worker threads under a bounded concurrency limit.
+    With a response cache, the cached_* methods answer repeat requests
+    locally without spending rate-limit budget.
+    """
+
+    def __init__(self, api_key: str, model: str = GEMINI_MODEL, base_url: str = GEMINI_BASE_URL,
+                 connect_timeout: float = 5.0, read_timeout: float = 60.0, max_retries: int = 3,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0, max_concurrency: int = 8,
+                 pool_size: int = 16, cache: LLMResponseCache = None):
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_concurrency = max_concurrency
+        self.cache = cache
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+        # Per event loop: a semaphore only works on the loop it first waited on.
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._semaphores_lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"{self.base_url}/models/{self.model}:generateContent?key={self.api_key}"
+
+    def _backoff_seconds(self, attempt: int, response: Optional[requests.Response]) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.backoff_max)
+                except ValueError:
+                    pass
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    def generate_content(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """POSTs the payload and returns the decoded JSON body; raises requests exceptions on failure."""
+        attempt = 0
+        while True:
+            response = None
+            try:
+                response = self.session.post(self.url, json=payload, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    response.raise_for_status()
+                    return response.json()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+            time.sleep(self._backoff_seconds(attempt, response))
+            attempt += 1
+
+    def _cache_key(self, payload: Dict[str, Any]) -> str:
+        return self.cache.make_key(self.model, payload, self.base_url)
+
+    def _generate_and_store(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        body = self.generate_content(payload)
+        if self.cache is not None and body.get("candidates"):
+            self.cache.put(self._cache_key(payload), body)
+        return body
+
+    def cached_generate_content(self, payload: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        """generate_content through the response cache; returns (body, cache_hit)."""
+        if self.cache is not None:
+            cached = self.cache.get(self._cache_key(payload))
+            if cached is not None:
+                return cached, True
+        return self._generate_and_store(payload), False
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._semaphores_lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                # A semaphore that has waited holds a reference to its loop,
+                # so closed loops are dropped here rather than left to the
+                # weak keys alone.
+                for stale in [known for known in self._semaphores.keys() if known.is_closed()]:
+                    del self._semaphores[stale]
+                semaphore = asyncio.Semaphore(self.max_concurrency)
+                self._semaphores[loop] = semaphore
+        return semaphore
+
+    async def agenerate_content(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        async with self._semaphore():
+            return await asyncio.to_thread(self.generate_content, payload)
+
+    async def acached_generate_content(self, payload: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        if self.cache is not None:
+            cached = await asyncio.to_thread(self.cache.get, self._cache_key(payload))
+            if cached is not None:
+                return cached, True
+        async with self._semaphore():
+            return await asyncio.to_thread(self._generate_and_store, payload), False
+
+    async def agenerate_many(self, payloads: List[Dict[str, Any]]) -> List[Union[Dict[str, Any], Exception]]:
+        """Fires all payloads concurrently (bounded by max_concurrency); exceptions are returned in place."""
+        tasks = [self.agenerate_content(payload) for payload in payloads]
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_clients: Dict[str, GeminiClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(api_key: str, **kwargs) -> GeminiClient:
+    """
+    Returns the process-wide pooled client for this API key, creating it on
+    first use with the default on-disk response cache.
+    """
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            kwargs.setdefault("cache", LLMResponseCache())
+            client = GeminiClient(api_key, **kwargs)
+            _clients[api_key] = client
+        return client
@@ -0,0 +1,62 @@
+import re
+from typing import List, Tuple
+
+CHARS_PER_TOKEN = 4
+DEFAULT_TOKEN_BUDGET = 2000
+HEADER_CHARS = 600
+WINDOW_BEFORE_CHARS = 200
+WINDOW_AFTER_CHARS = 400
+
+# Ordered by priority: when the budget is tight, earlier anchors keep their windows.
+ANCHOR_PATTERNS = [
+    r"Total\s+Amount\s+Due",
+    r"Total\s+Dues",
+    r"Minimum\s+Amount\s+Due",
+    r"Payment\s+Due\s+Date",
+    r"Statement\s+Summary",
+    r"Account\s+Summary",
+    r"Statement\s+(?:Date|Period)",
+    r"[\*Xx]{4,}[\s\-]*\d{4}",
+]
+COMPILED_ANCHORS = [re.compile(p, re.IGNORECASE) for p in ANCHOR_PATTERNS]
+
+
+def _merge_spans(spans: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def select_context(full_text: str, token_budget: int = DEFAULT_TOKEN_BUDGET,
+                   before: int = WINDOW_BEFORE_CHARS, after: int = WINDOW_AFTER_CHARS) -> str:
+    """
+    Builds a compact excerpt of the statement for the LLM: the header plus
+    bounded windows around summary anchors, kept in document order and cut
+    to roughly token_budget tokens. Returns full_text unchanged when it
+    already fits the budget or no anchor is found.
+    """
+    budget_chars = token_budget * CHARS_PER_TOKEN
+    if len(full_text) <= budget_chars:
+        return full_text
+
+    spans = [(0, min(HEADER_CHARS, len(full_text)))]
+    used = spans[0][1]
+    for anchor in COMPILED_ANCHORS:
+        for match in anchor.finditer(full_text):
+            span = (max(0, match.start() - before), min(len(full_text), match.end() + after))
+            candidate = _merge_spans(spans + [span])
+            size = sum(end - start for start, end in candidate)
+            if size > budget_chars:
+                continue
+            spans, used = candidate, size
+        if used >= budget_chars:
+            break
+
+    if len(spans) == 1 and spans[0][1] == min(HEADER_CHARS, len(full_text)):
+        return full_text
+
+    return "\n...\n".join(full_text[start:end] for start, end in spans)
@@ -0,0 +1,151 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Tuple
+
+DEFAULT_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Tuple[str, str] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in pairs) + "}"
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters and histograms for parse results, rendered in the
+    Prometheus text exposition format. observe_result() ingests the
+    "timings" breakdown that parse_statement attaches to every result.
+    """
+
+    def __init__(self, namespace: str = "ccparser", buckets: List[float] = None):
+        self.namespace = namespace
+        self.buckets = sorted(buckets or DEFAULT_BUCKETS)
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, List[float]]] = {}
+        self._help: Dict[str, str] = {}
+
+    def inc(self, name: str, help_text: str, value: float = 1.0, **labels) -> None:
+        with self._lock:
+            self._help.setdefault(name, help_text)
+            series = self._counters.setdefault(name, {})
+            key = _label_key(labels)
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, help_text: str, seconds: float, **labels) -> None:
+        with self._lock:
+            self._help.setdefault(name, help_text)
+            series = self._histograms.setdefault(name, {})
+            key = _label_key(labels)
+            # Per-bucket counts followed by sum and count.
+            state = series.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    state[i] += 1
+            state[-2] += seconds
+            state[-1] += 1
+
+    def observe_result(self, result: Dict[str, Any]) -> None:
+        """Records counters and stage histograms for one parse_statement result."""
+        bank = result.get("bank_name", "unknown")
+        self.inc("documents_total", "Documents parsed, by outcome.",
+                 status=result.get("status", "UNKNOWN"), bank=bank,
+                 method=result.get("extraction_method", "none"))
+        if result.get("cache_status"):
+            self.inc("result_cache_lookups_total", "Result cache lookups.", result=result["cache_status"])
+        if result.get("cache_status") == "HIT":
+            # Nothing was parsed: the stage, LLM and field series only count real work.
+            return
+        if result.get("llm_status"):
+            self.inc("llm_fallbacks_total", "LLM fallback outcomes.", status=result["llm_status"])
+        self.inc("llm_cache_hits_total", "LLM response cache hits.", result.get("llm_cache_hits", 0))
+        self.inc("llm_cache_misses_total", "LLM response cache misses.", result.get("llm_cache_misses", 0))
+
+        timings = result.get("timings") or {}
+        stage_help = "Time spent per parse stage."
+        for stage in ("pdf_open", "text_extraction", "identify_bank", "llm", "total"):
+            if f"{stage}_ms" in timings:
+                self.observe("stage_duration_seconds", stage_help, timings[f"{stage}_ms"] / 1000.0, stage=stage)
+        for page_ms in timings.get("page_ms", []):
+            self.observe("stage_duration_seconds", stage_help, page_ms / 1000.0, stage="page_extract")
+        self.inc("pages_total", "PDF pages whose text was extracted.", len(timings.get("page_ms", [])))
+        if timings.get("layout_hints"):
+            self.inc("layout_hints_total", "Layout-hint region extractions, by outcome.", result=timings["layout_hints"])
+        for backend in timings.get("pdf_backends", []):
+            self.inc("pdf_extractions_total", "PDF text extractions, by backend.", backend=backend)
+
+        for field, entry in (timings.get("fields") or {}).items():
+            self.observe("field_duration_seconds", "Time spent per field pattern loop.",
+                         entry.get("ms", 0.0) / 1000.0, field=field)
+            self.inc("field_matches_total", "Winning pattern per field (source/pattern_index/region).",
+                     bank=bank, field=field, source=entry.get("source") or "not_found",
+                     pattern_index="" if entry.get("pattern_index") is None else entry["pattern_index"],
+                     region=entry.get("region") or "")
+        for hit in timings.get("pattern_budget_hits", []):
+            self.inc("pattern_budget_hits_total", "Pattern searches over their time budget; aborted ones count as misses.",
+                     pattern=hit["pattern"], aborted=str(hit["aborted"]).lower())
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                full = f"{self.namespace}_{name}"
+                lines.append(f"# HELP {full} {self._help.get(name, '')}")
+                lines.append(f"# TYPE {full} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{full}{_format_labels(key)} {value:g}")
+            for name, series in sorted(self._histograms.items()):
+                full = f"{self.namespace}_{name}"
+                lines.append(f"# HELP {full} {self._help.get(name, '')}")
+                lines.append(f"# TYPE {full} histogram")
+                for key, state in sorted(series.items()):
+                    for bound, count in zip(self.buckets, state):
+                        lines.append(f"{full}_bucket{_format_labels(key, ('le', f'{bound:g}'))} {count:g}")
+                    lines.append(f"{full}_bucket{_format_labels(key, ('le', '+Inf'))} {state[-1]:g}")
+                    lines.append(f"{full}_sum{_format_labels(key)} {state[-2]:.6f}")
+                    lines.append(f"{full}_count{_format_labels(key)} {state[-1]:g}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.render_prometheus())
+
+
+REGISTRY = MetricsRegistry()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        data = self.server.registry.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def serve_metrics(port: int, registry: MetricsRegistry = REGISTRY, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serves GET /metrics from a daemon thread; call shutdown() on the returned server to stop."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    server.registry = registry
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
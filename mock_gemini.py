@@ -0,0 +1,168 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, Tuple
+
+DEFAULT_ANSWERS = {
+    "statement_date": "15/03/2024",
+    "payment_due_date": "04/04/2024",
+    "total_due": "12,345.67",
+    "min_payment": "620.00",
+    "card_last_4_digits": "4321",
+}
+
+GENERATE_PATH = re.compile(r"^/v1beta/models/(?P<model>[^/:]+):generateContent$")
+
+
+class MockConfig:
+    """Behaviour knobs for the stand-in server. Rates are probabilities in [0, 1]."""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, retry_after_seconds: float = 1.0,
+                 answers: Dict[str, str] = None, seed: int = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after_seconds = retry_after_seconds
+        self.answers = dict(DEFAULT_ANSWERS if answers is None else answers)
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "ok": 0, "errors": 0, "rate_limited": 0}
+
+    def count(self, key: str) -> None:
+        with self.lock:
+            self.stats[key] += 1
+
+    def roll(self) -> Tuple[float, float]:
+        with self.lock:
+            return self.random.random(), self.random.uniform(-self.jitter_ms, self.jitter_ms)
+
+
+def build_response(payload: Dict[str, Any], answers: Dict[str, str]) -> Dict[str, Any]:
+    """Answers every field of the request's responseSchema from the canned answers."""
+    schema = payload.get("generationConfig", {}).get("responseSchema", {})
+    fields = schema.get("properties") or {key: {} for key in DEFAULT_ANSWERS}
+    data = {key: answers.get(key, "NOT_FOUND") for key in fields}
+    return {
+        "candidates": [{
+            "content": {"role": "model", "parts": [{"text": json.dumps(data)}]},
+            "finishReason": "STOP",
+        }],
+        "usageMetadata": {"promptTokenCount": len(json.dumps(payload)) // 4},
+    }
+
+
+class MockGeminiHandler(BaseHTTPRequestHandler):
+    server_version = "MockGemini/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Dict[str, str] = None) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        config: MockConfig = self.server.config
+        if self.path == "/stats":
+            with config.lock:
+                self._send_json(200, dict(config.stats))
+        else:
+            self._send_json(404, {"error": {"code": 404, "message": "Not found"}})
+
+    def do_POST(self) -> None:
+        config: MockConfig = self.server.config
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length)
+        path = self.path.split("?", 1)[0]
+        if not GENERATE_PATH.match(path):
+            self._send_json(404, {"error": {"code": 404, "message": "Not found"}})
+            return
+
+        config.count("requests")
+        roll, jitter = config.roll()
+        delay = max(0.0, config.latency_ms + jitter) / 1000.0
+        if delay:
+            time.sleep(delay)
+
+        if roll < config.rate_limit_rate:
+            config.count("rate_limited")
+            self._send_json(429, {"error": {"code": 429, "message": "Resource exhausted", "status": "RESOURCE_EXHAUSTED"}},
+                            {"Retry-After": str(config.retry_after_seconds)})
+            return
+        if roll < config.rate_limit_rate + config.error_rate:
+            config.count("errors")
+            self._send_json(500, {"error": {"code": 500, "message": "Internal error", "status": "INTERNAL"}})
+            return
+
+        try:
+            payload = json.loads(raw or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"code": 400, "message": "Invalid JSON payload", "status": "INVALID_ARGUMENT"}})
+            return
+
+        config.count("ok")
+        self._send_json(200, build_response(payload, config.answers))
+
+
+def start_mock_server(config: MockConfig = None, host: str = "127.0.0.1",
+                      port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Starts the server on a daemon thread and returns (server, base_url).
+    Pass base_url to GeminiClient or set it as GEMINI_BASE_URL; call
+    server.shutdown() when done.
+    """
+    server = ThreadingHTTPServer((host, port), MockGeminiHandler)
+    server.daemon_threads = True
+    server.config = config or MockConfig()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    bound_host, bound_port = server.server_address[:2]
+    return server, f"http://{bound_host}:{bound_port}/v1beta"
+
+
+def main(argv=None) -> None:
+    arg_parser = argparse.ArgumentParser(description="Local stand-in for the Gemini generateContent endpoint.")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8765)
+    arg_parser.add_argument("--latency-ms", type=float, default=0.0)
+    arg_parser.add_argument("--jitter-ms", type=float, default=0.0)
+    arg_parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of a 500 response")
+    arg_parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Probability of a 429 response")
+    arg_parser.add_argument("--retry-after", type=float, default=1.0)
+    arg_parser.add_argument("--answers", help="JSON file of canned field answers")
+    arg_parser.add_argument("--seed", type=int)
+    args = arg_parser.parse_args(argv)
+
+    answers: Optional[Dict[str, str]] = None
+    if args.answers:
+        with open(args.answers, encoding="utf-8") as f:
+            answers = json.load(f)
+
+    config = MockConfig(args.latency_ms, args.jitter_ms, args.error_rate, args.rate_limit_rate,
+                        args.retry_after, answers, args.seed)
+    server = ThreadingHTTPServer((args.host, args.port), MockGeminiHandler)
+    server.config = config
+    print(f"Mock Gemini listening; set GEMINI_BASE_URL=http://{args.host}:{args.port}/v1beta")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
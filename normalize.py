@@ -0,0 +1,230 @@
+import re
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+import numpy as np
+import pandas as pd
+from regex_patterns import REGEX_TEMPLATES, DATE_FORMAT_HINTS
+from parser import clean_amount
+
+AMOUNT_FIELDS = ["total_due", "min_payment"]
+DATE_FIELDS = ["statement_date", "payment_due_date"]
+AMOUNT_SCALE = 2
+# Whole parts past 15 digits would overflow int64 once scaled.
+MAX_WHOLE_DIGITS = 15
+FIXED_POINT_VALUE = re.compile(r"\d{1,15}(?:\.\d*)?")
+
+# Rows are processed in chunks of this many to bound the byte-matrix size;
+# amounts longer than MAX_AMOUNT_BYTES take the scalar path.
+CHUNK_ROWS = 65536
+MAX_AMOUNT_BYTES = 48
+# Below this many rows building the byte matrix costs more than it saves,
+# so short columns (one statement's transactions) use the scalar cleaner.
+SCALAR_MAX_ROWS = 512
+
+try:
+    import pyarrow as pa
+    STRING_DTYPE = pd.StringDtype("pyarrow")
+except ImportError:
+    # Without pyarrow the column functions fall back to the scalar cleaner.
+    pa = None
+    STRING_DTYPE = pd.StringDtype()
+
+ZERO, NINE, DOT = ord("0"), ord("9"), ord(".")
+
+# Bank display name (what results carry) -> bank key.
+BANK_KEYS_BY_NAME = {template["identifier"][0]: bank_key for bank_key, template in REGEX_TEMPLATES.items()}
+
+
+def _byte_matrix(strings: "pa.Array") -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (chars, scalar_rows) for an Arrow string chunk: chars is an (n, width)
+    uint8 matrix of each value's UTF-8 bytes, zero padded. scalar_rows marks
+    values that must go through the scalar cleaner instead: non-ASCII ones
+    (Python's \\d also keeps non-ASCII digits) and very long ones.
+    """
+    strings = strings.cast(pa.large_string())
+    _, offsets_buffer, data_buffer = strings.buffers()
+    offsets = np.frombuffer(offsets_buffer, dtype=np.int64)[strings.offset:strings.offset + len(strings) + 1]
+    data = np.frombuffer(data_buffer, dtype=np.uint8) if data_buffer is not None and data_buffer.size else np.zeros(1, np.uint8)
+    lengths = np.diff(offsets)
+    width = int(min(lengths.max(initial=0), MAX_AMOUNT_BYTES))
+    columns = np.arange(width)
+    inside = columns < lengths[:, None]
+    chars = np.where(inside, data[np.minimum(offsets[:-1, None] + columns, data.size - 1)], 0).astype(np.uint8)
+    scalar_rows = (lengths > MAX_AMOUNT_BYTES) | (chars >= 0x80).any(axis=1)
+    return chars, scalar_rows
+
+
+def _amount_masks(chars: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(is_digit, kept_dot, last_dot) where kept_dot marks only each row's last "."."""
+    is_digit = (chars >= ZERO) & (chars <= NINE)
+    is_dot = chars == DOT
+    width = chars.shape[1]
+    last_dot = np.where(is_dot.any(axis=1), width - 1 - np.argmax(is_dot[:, ::-1], axis=1), -1) if width else \
+        np.full(len(chars), -1)
+    kept_dot = is_dot & (np.arange(width) == last_dot[:, None])
+    return is_digit, kept_dot, last_dot
+
+
+def _iter_chunks(values: pd.Series) -> Iterator[Tuple[slice, "pa.Array"]]:
+    strings = pa.array(values.astype(STRING_DTYPE).array)
+    if isinstance(strings, pa.ChunkedArray):
+        strings = strings.combine_chunks()
+    for start in range(0, len(strings), CHUNK_ROWS):
+        yield slice(start, start + CHUNK_ROWS), strings.slice(start, CHUNK_ROWS)
+
+
+def clean_amounts(values: pd.Series) -> pd.Series:
+    """
+    Column version of parser.clean_amount, identical value for value: keeps
+    only digits and the last ".". Works on the UTF-8 byte matrix of each
+    chunk, so the cost is a handful of NumPy passes rather than one regex
+    call per value. Missing values stay missing.
+    """
+    if pa is None or len(values) < SCALAR_MAX_ROWS:
+        return values.astype(STRING_DTYPE).map(clean_amount, na_action="ignore").astype(STRING_DTYPE)
+    chunks, valid, scalar = [], [], []
+    for _, strings in _iter_chunks(values):
+        chars, scalar_rows = _byte_matrix(strings)
+        is_digit, kept_dot, _ = _amount_masks(chars)
+        keep = is_digit | kept_dot
+        # A stable sort on "dropped" packs the kept bytes to the front in order.
+        packed = np.take_along_axis(chars, np.argsort(~keep, axis=1, kind="stable"), axis=1)
+        kept_lengths = keep.sum(axis=1)
+        offsets = np.concatenate([[0], np.cumsum(kept_lengths)]).astype(np.int64)
+        data = packed[np.arange(chars.shape[1]) < kept_lengths[:, None]].tobytes()
+        chunks.append(pa.LargeStringArray.from_buffers(len(strings), pa.py_buffer(offsets), pa.py_buffer(data)))
+        valid.append(strings.is_valid().to_numpy(zero_copy_only=False))
+        scalar.append(scalar_rows)
+
+    result = STRING_DTYPE.__from_arrow__(pa.chunked_array(chunks))
+    result[~np.concatenate(valid)] = pd.NA
+    scalar_rows = np.concatenate(scalar)
+    if scalar_rows.any():
+        result[scalar_rows] = values[scalar_rows].map(clean_amount).to_numpy()
+    return pd.Series(result, index=values.index)
+
+
+def _scalar_units(value: Any, scale: int) -> Any:
+    cleaned = clean_amount(value) if isinstance(value, str) else None
+    if not cleaned or not FIXED_POINT_VALUE.fullmatch(cleaned):
+        return pd.NA
+    return int(Decimal(cleaned).scaleb(scale).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def amounts_to_fixed_point(values: pd.Series, scale: int = AMOUNT_SCALE) -> pd.Series:
+    """
+    Cleans raw amount strings and returns them as nullable Int64 in units
+    of 10**-scale (paise by default), rounding half up. Values that are not
+    a number once cleaned (NOT_FOUND, "", ".50") become <NA>. Digits are
+    weighted by their place in the byte matrix; no strings are rebuilt.
+    """
+    if pa is None or len(values) < SCALAR_MAX_ROWS:
+        return values.astype(STRING_DTYPE).map(lambda v: _scalar_units(v, scale)).astype("Int64")
+    result = pd.arrays.IntegerArray(np.zeros(len(values), dtype=np.int64), np.ones(len(values), dtype=bool))
+    for rows, strings in _iter_chunks(values):
+        chars, scalar_rows = _byte_matrix(strings)
+        is_digit, _, last_dot = _amount_masks(chars)
+        columns = np.arange(chars.shape[1])
+        has_dot = last_dot[:, None] >= 0
+        whole = is_digit & (~has_dot | (columns < last_dot[:, None]))
+        fraction = is_digit & has_dot & (columns > last_dot[:, None])
+        digit = chars.astype(np.int64) - ZERO
+
+        whole_count = whole.sum(axis=1)
+        places = np.clip(whole_count[:, None] - np.cumsum(whole, axis=1), 0, MAX_WHOLE_DIGITS)
+        units = np.where(whole, digit * 10 ** places, 0).sum(axis=1) * 10 ** scale
+        rank = np.cumsum(fraction, axis=1)
+        units += np.where(fraction & (rank <= scale), digit * 10 ** np.clip(scale - rank, 0, scale), 0).sum(axis=1)
+        units += (fraction & (rank == scale + 1) & (digit >= 5)).any(axis=1)
+
+        numeric = strings.is_valid().to_numpy(zero_copy_only=False) & (whole_count >= 1) & \
+            (whole_count <= MAX_WHOLE_DIGITS) & ~scalar_rows
+        chunk = pd.arrays.IntegerArray(units, ~numeric)
+        if scalar_rows.any():
+            chunk[scalar_rows] = values.iloc[rows][scalar_rows].map(lambda v: _scalar_units(v, scale)).astype("Int64").array
+        result[rows] = chunk
+    return pd.Series(result, index=values.index)
+
+
+def amounts_to_decimal(values: pd.Series, scale: int = AMOUNT_SCALE) -> pd.Series:
+    """Like amounts_to_fixed_point but as an object column of Decimal (None where missing)."""
+    units = amounts_to_fixed_point(values, scale)
+    return pd.Series([None if pd.isna(u) else Decimal(int(u)).scaleb(-scale) for u in units],
+                     index=values.index, dtype="object")
+
+
+def dates_to_iso(values: pd.Series, bank_key: str = None) -> pd.Series:
+    """
+    Parses a column of raw statement dates with the bank's DATE_FORMAT_HINTS
+    (then the default formats) and returns "YYYY-MM-DD" strings, <NA> where
+    no format fits. Each format is one vectorized pass over the values still
+    unparsed.
+    """
+    text = values.astype(STRING_DTYPE).fillna("")
+    text = text.str.replace(r"[\-\.]", "/", regex=True).str.replace(",", " ").str.replace(r"\s+", " ", regex=True).str.strip()
+    formats = list(DATE_FORMAT_HINTS.get(bank_key, []))
+    formats += [f for f in DATE_FORMAT_HINTS["default"] if f not in formats]
+
+    parsed = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    for fmt in formats:
+        pending = parsed.isna() & (text != "")
+        if not pending.any():
+            break
+        parsed[pending] = pd.to_datetime(text[pending], format=fmt, errors="coerce")
+    return parsed.dt.strftime("%Y-%m-%d").astype("string")
+
+
+def normalize_frame(frame: pd.DataFrame, bank_key: str = None, amount_fields: List[str] = None,
+                    date_fields: List[str] = None, decimal: bool = False) -> pd.DataFrame:
+    """
+    Returns a copy of `frame` with amount columns as fixed-point Int64 (or
+    Decimal with decimal=True) and date columns as ISO strings. Without a
+    bank_key, rows are grouped by their bank_key/bank_name column so each
+    bank's date hints apply.
+    """
+    frame = frame.copy()
+    amount_fields = [f for f in (AMOUNT_FIELDS if amount_fields is None else amount_fields) if f in frame]
+    date_fields = [f for f in (DATE_FIELDS if date_fields is None else date_fields) if f in frame]
+    to_amount = amounts_to_decimal if decimal else amounts_to_fixed_point
+    for field in amount_fields:
+        frame[field] = to_amount(frame[field])
+
+    if bank_key is not None:
+        banks = pd.Series(bank_key, index=frame.index)
+    elif "bank_key" in frame:
+        banks = frame["bank_key"].fillna("default")
+    elif "bank_name" in frame:
+        banks = frame["bank_name"].map(BANK_KEYS_BY_NAME).fillna("default")
+    else:
+        banks = pd.Series("default", index=frame.index)
+    for field in date_fields:
+        iso = pd.Series(pd.NA, index=frame.index, dtype="string")
+        for bank, rows in banks.groupby(banks).groups.items():
+            iso[rows] = dates_to_iso(frame.loc[rows, field], bank)
+        frame[field] = iso
+    return frame
+
+
+def normalize_results(results: Iterable[Dict[str, Any]], decimal: bool = False) -> pd.DataFrame:
+    """
+    One row per parse result with the summary fields normalized; raw_text
+    and timings are dropped and NOT_FOUND becomes <NA>.
+    """
+    frame = pd.DataFrame([{k: v for k, v in result.items() if k not in ("raw_text", "timings")}
+                          for result in results])
+    frame = frame.replace("NOT_FOUND", pd.NA)
+    return normalize_frame(frame, decimal=decimal)
+
+
+def normalize_transactions(rows: Iterable[Any], bank_key: str = None, decimal: bool = False) -> pd.DataFrame:
+    """
+    Frame of transactions.TransactionRow tuples with fixed-point (or Decimal)
+    amounts, ISO dates and a signed amount (credits negative).
+    """
+    frame = pd.DataFrame(list(rows), columns=["date", "description", "amount", "direction", "page"])
+    frame = normalize_frame(frame, bank_key, amount_fields=["amount"], date_fields=["date"], decimal=decimal)
+    sign = np.where(frame["direction"] == "Cr", -1, 1)
+    frame["signed_amount"] = frame["amount"] * sign if not decimal else \
+        [None if a is None else a * s for a, s in zip(frame["amount"], sign)]
+    return frame
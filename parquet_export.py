@@ -0,0 +1,164 @@
+import os
+import uuid
+from typing import Any, Dict, List
+import pandas as pd
+from normalize import AMOUNT_SCALE, BANK_KEYS_BY_NAME, normalize_frame
+from parser import KEYS_TO_SEARCH
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:
+    pa = None
+
+# Results are buffered and written as one file per partition every this many
+# documents (and on close), which keeps files large enough to scan quickly.
+FLUSH_DOCUMENTS = int(os.getenv("CREDITCARD_INTEL_PARQUET_FLUSH_DOCS", "500"))
+PARTITION_COLUMNS = ["bank", "statement_month"]
+UNKNOWN_PARTITION = "unknown"
+
+if pa is not None:
+    AMOUNT_TYPE = pa.decimal128(18, AMOUNT_SCALE)
+    RESULT_SCHEMA = pa.schema([
+        ("path", pa.string()),
+        ("status", pa.string()),
+        ("bank_name", pa.string()),
+        ("extraction_method", pa.string()),
+        ("statement_date", pa.date32()),
+        ("payment_due_date", pa.date32()),
+        ("total_due", AMOUNT_TYPE),
+        ("min_payment", AMOUNT_TYPE),
+        ("card_last_4_digits", pa.string()),
+        ("llm_status", pa.string()),
+        ("reason", pa.string()),
+        ("elapsed_ms", pa.float64()),
+        ("transaction_count", pa.int32()),
+        ("bank", pa.string()),
+        ("statement_month", pa.string()),
+    ])
+    TRANSACTION_SCHEMA = pa.schema([
+        ("path", pa.string()),
+        ("date", pa.date32()),
+        ("description", pa.string()),
+        ("amount", AMOUNT_TYPE),
+        ("direction", pa.string()),
+        ("page", pa.int32()),
+        ("bank", pa.string()),
+        ("statement_month", pa.string()),
+    ])
+
+
+def _partitioning() -> "ds.Partitioning":
+    return ds.partitioning(pa.schema([(c, pa.string()) for c in PARTITION_COLUMNS]), flavor="hive")
+
+
+def _decimal_column(units: pd.Series) -> "pa.Array":
+    # Fixed-point units are the decimal's unscaled value: cast to scale 0
+    # (int64 needs precision 19), then relabel the same 128-bit buffers with
+    # the real scale. Amounts are capped at 15 whole digits, so 18 suffices.
+    unscaled = pa.array(units, type=pa.int64(), from_pandas=True).cast(pa.decimal128(19, 0))
+    return pa.Array.from_buffers(AMOUNT_TYPE, len(unscaled), unscaled.buffers(), unscaled.null_count)
+
+
+def _arrow_table(frame: pd.DataFrame, schema: "pa.Schema", amount_fields: List[str],
+                 date_fields: List[str]) -> "pa.Table":
+    columns = []
+    for field in schema:
+        if field.name not in frame:
+            columns.append(pa.nulls(len(frame), field.type))
+        elif field.name in amount_fields:
+            columns.append(_decimal_column(frame[field.name]))
+        elif field.name in date_fields:
+            columns.append(pa.array(frame[field.name], type=pa.string(), from_pandas=True).cast(pa.date32()))
+        else:
+            columns.append(pa.array(frame[field.name], type=field.type, from_pandas=True))
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+class ParquetExporter:
+    """
+    Appends parse results, and their transactions when present, to Hive
+    partitioned Parquet datasets under `root`:
+        root/results/bank=hdfc/statement_month=2024-03/part-*.parquet
+        root/transactions/bank=hdfc/statement_month=2024-03/part-*.parquet
+    Amounts are decimal(18, 2) and dates date32. Every flush adds new files
+    and never rewrites existing ones, so a dataset can keep growing across
+    runs. Use as a context manager, or call close().
+    """
+
+    def __init__(self, root: str, flush_documents: int = FLUSH_DOCUMENTS):
+        if pa is None:
+            raise ImportError("Parquet export needs pyarrow (pip install pyarrow)")
+        self.root = root
+        self.flush_documents = max(1, flush_documents)
+        self._results: List[Dict[str, Any]] = []
+        self._transactions: List[Dict[str, Any]] = []
+        self.documents_written = 0
+        self.transactions_written = 0
+
+    def write(self, result: Dict[str, Any]) -> None:
+        row = {k: v for k, v in result.items() if k not in ("raw_text", "timings", "transactions")}
+        for key in KEYS_TO_SEARCH:
+            if row.get(key) == "NOT_FOUND":
+                row[key] = None
+        transactions = result.get("transactions")
+        if transactions is not None:
+            row["transaction_count"] = len(transactions)
+            self._transactions.extend(dict(t, path=result.get("path"), _document=len(self._results))
+                                      for t in transactions)
+        self._results.append(row)
+        if len(self._results) >= self.flush_documents:
+            self.flush()
+
+    def _write_dataset(self, table: "pa.Table", name: str) -> None:
+        ds.write_dataset(
+            table, os.path.join(self.root, name), format="parquet", partitioning=_partitioning(),
+            basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+
+    def flush(self) -> None:
+        """Writes the buffered documents out as new Parquet files."""
+        if not self._results:
+            return
+        results = normalize_frame(pd.DataFrame(self._results))
+        banks = pd.Series([r.get("bank_name") for r in self._results]).map(BANK_KEYS_BY_NAME)
+        results["bank"] = banks.fillna(UNKNOWN_PARTITION).to_numpy()
+        results["statement_month"] = results["statement_date"].str[:7].fillna(UNKNOWN_PARTITION).to_numpy() \
+            if "statement_date" in results else UNKNOWN_PARTITION
+        self._write_dataset(_arrow_table(results, RESULT_SCHEMA, ["total_due", "min_payment"],
+                                         ["statement_date", "payment_due_date"]), "results")
+
+        if self._transactions:
+            transactions = pd.DataFrame(self._transactions)
+            document = transactions.pop("_document")
+            for column in PARTITION_COLUMNS:
+                transactions[column] = results[column].to_numpy()[document.to_numpy()]
+            # Each statement's own bank picks its date hints.
+            transactions["bank_key"] = transactions["bank"]
+            transactions = normalize_frame(transactions, amount_fields=["amount"], date_fields=["date"])
+            self._write_dataset(_arrow_table(transactions, TRANSACTION_SCHEMA, ["amount"], ["date"]), "transactions")
+
+        self.documents_written += len(self._results)
+        self.transactions_written += len(self._transactions)
+        self._results = []
+        self._transactions = []
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> "ParquetExporter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def open_dataset(root: str, name: str = "results") -> "ds.Dataset":
+    """
+    The exported "results" or "transactions" dataset with its partitions
+    recognised, so filters on bank/statement_month skip whole directories
+    and only the requested columns are read, e.g.
+        open_dataset(root).to_table(columns=["total_due"], filter=ds.field("bank") == "hdfc")
+    """
+    return ds.dataset(os.path.join(root, name), format="parquet", partitioning=_partitioning())
@@ -1,39 +1,89 @@
-import pdfplumber
 import re
 import io
 import json
 import os
+import sys
+import time
 import requests
-from typing import Dict, Any, List
-from regex_patterns import REGEX_TEMPLATES
+from typing import Dict, Any, List, Iterator, Tuple, Callable
+from regex_patterns import REGEX_TEMPLATES, LAYOUT_HINT_REGIONS, LAYOUT_IDENTIFY_BBOX
+from template_compiler import COMPILED_TEMPLATES
+from bank_classifier import BANK_CLASSIFIER
+from document_context import DocumentContext
+from section_index import SectionIndex
+from pdf_backends import ACCURATE_BACKEND, LAYOUT_HINTS_ENABLED, backends_for_mode, get_backend
+from llm_client import GeminiClient, get_client, GEMINI_MODEL, API_URL_TEMPLATE
+from llm_context import select_context
 
-GEMINI_MODEL = "gemini-2.5-flash-preview-05-20"
-API_URL_TEMPLATE = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent?key="
+PARSER_VERSION = "1.2.0"
 
-def extract_text_from_pdf(pdf_file: io.BytesIO) -> str:
-    """Extracts text from all pages of the PDF file."""
+STREAM_OVERLAP_CHARS = 2000
+
+# Written between pages of the extracted text: a form feed on a line of its
+# own, so line anchors and \s runs still work across it. Splitting the text
+# on it gives the pages back (e.g. for transaction rows).
+PAGE_BREAK = "\f\n"
+
+KEYS_TO_SEARCH = ["statement_date", "payment_due_date", "total_due", "min_payment", "card_last_4_digits"]
+
+LLM_REQUIRED_KEYS = ["total_due", "payment_due_date", "min_payment"]
+
+NON_AMOUNT_CHARS = re.compile(r'[^\d.]')
+AMOUNT_VALUE = re.compile(r'^\d+\.?\d*$')
+WHITESPACE_RUN = re.compile(r'[\s\n]+')
+
+HDFC_TOTAL_DUES = re.compile(r"Total\s+Dues[\s\S]{0,100}?([\d,]+\.[\d]{2})", re.IGNORECASE)
+HDFC_ACCOUNT_SUMMARY_DUES = re.compile(
+    r"Account\s+Summary[\s\S]{1,500}?Total\s+Dues[\s\S]{0,100}?([\d,]+\.[\d]{2})", re.IGNORECASE
+)
+IDFC_SUMMARY_TOTAL = re.compile(
+    r"Statement\s+Summary[\s\S]{1,500}?Total\s+Amount\s+Due[\s\S]{0,100}?`?\s*([\d,]+\.[\d]{2})",
+    re.IGNORECASE | re.DOTALL,
+)
+IDFC_MINIMUM = re.compile(r"Minimum\s+Amount\s+Due[\s\S]{0,100}?`?\s*([\d,]+\.[\d]{2})", re.IGNORECASE)
+IDFC_PAYMENT_SECTION = re.compile(
+    r"Payment\s+Due\s+Date[\s\S]{0,200}?Total\s+Amount\s+Due[\s\S]{0,50}?`?\s*([\d,]+\.[\d]{2})"
+    r"[\s\S]{0,100}?Minimum\s+Amount\s+Due[\s\S]{0,50}?`?\s*([\d,]+\.[\d]{2})",
+    re.IGNORECASE | re.DOTALL,
+)
+IDFC_TOTAL_STANDALONE = re.compile(
+    r"Total\s+Amount\s+Due\s*\n?\s*`?\s*([\d,]+\.[\d]{2})\s*(?:CR|Dr)?", re.IGNORECASE
+)
+IDFC_MIN_STANDALONE = re.compile(r"Minimum\s+Amount\s+Due\s*\n?\s*`?\s*([\d,]+\.[\d]{2})", re.IGNORECASE)
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 3)
+
+def iter_pdf_pages(pdf_file: io.BytesIO, timings: Dict[str, Any] = None, backend: str = None) -> Iterator[str]:
+    """
+    Lazily yields the cleaned text of each PDF page; stops early if closed.
+    `backend` names a pdf_backends engine (default pdfplumber). If a
+    timings dict is given, PDF open time and per-page extraction times
+    are recorded in it.
+    """
     try:
-        with pdfplumber.open(pdf_file) as pdf:
-            full_text = ""
-            for page in pdf.pages:
-                text = page.extract_text()
+        start = time.perf_counter()
+        with get_backend(backend).open(pdf_file) as pages:
+            if timings is not None:
+                timings["pdf_open_ms"] = round(timings.get("pdf_open_ms", 0.0) + _elapsed_ms(start), 3)
+                timings.setdefault("page_ms", [])
+            for page_text in pages:
+                page_start = time.perf_counter()
+                text = page_text()
+                if timings is not None:
+                    timings["page_ms"].append(_elapsed_ms(page_start))
                 if text:
-                    cleaned_text = re.sub(r'[\r\n]+', '\n', text)
-                    full_text += cleaned_text + "\n"
-            return full_text
+                    yield re.sub(r'[\r\n]+', '\n', text) + "\n"
     except Exception as e:
-        print(f"Error during PDF text extraction: {e}")
-        return ""
-
-def identify_bank(text: str) -> str:
-    """Identifies the bank based on keywords found in the text."""
-    clean_text = text.upper().replace('\n', ' ')
-    for bank_key, template in REGEX_TEMPLATES.items():
-        identifiers_to_check = [i.upper() for i in template.get("identifier", [])]
-        for identifier in identifiers_to_check:
-            if identifier in clean_text:
-                return bank_key
-    return "unknown"
+        print(f"Error during PDF text extraction: {e}", file=sys.stderr)
+
+def extract_text_from_pdf(pdf_file: io.BytesIO, timings: Dict[str, Any] = None, backend: str = None) -> str:
+    """Extracts text from all pages of the PDF file, joined by PAGE_BREAK."""
+    return PAGE_BREAK.join(iter_pdf_pages(pdf_file, timings, backend))
+
+def identify_bank(text: str, max_chars: int = None) -> str:
+    """Identifies the bank from position-weighted keyword scores in the text."""
+    return BANK_CLASSIFIER.classify(text, max_chars)
 
 def clean_amount(value: str) -> str:
     """
@@ -43,35 +93,26 @@ def clean_amount(value: str) -> str:
     if not value:
         return value
     
-    
-    value = value.replace('$', '').replace('£', '').replace('₹', '').replace('Rs', '').replace('`', '').strip()
-    value = value.replace('DR', '').replace('Cr', '').replace('CR', '').replace('dr', '').replace('cr', '').strip()
-    
-    
-    value = value.replace(' ', '')
-    
-    
-    if ',' in value and '.' in value:
-        value = value.replace(',', '')
-    elif ',' in value:
-        value = value.replace(',', '')
-    
-    
-    value = re.sub(r'[^\d.]', '', value)
+    # Currency symbols, Dr/Cr markers, spaces and thousands separators all
+    # fall outside [\d.], so one substitution strips every one of them.
+    value = NON_AMOUNT_CHARS.sub('', value)
     
     
     if value.count('.') > 1:
         parts = value.split('.')
         value = ''.join(parts[:-1]) + '.' + parts[-1]
     
-    return value.strip()
+    return value
 
-def extract_hdfc_total_dues(text: str) -> str:
+def extract_hdfc_total_dues(text: str, context: DocumentContext = None) -> str:
     """
     Special extraction logic for HDFC Total Dues from Account Summary table.
     """
-    pattern = r"Total\s+Dues[\s\S]{0,100}?([\d,]+\.[\d]{2})"
-    matches = re.findall(pattern, text, re.IGNORECASE)
+    context = context or DocumentContext(text)
+    dues_start = context.first_anchor("total_dues")
+    if dues_start < 0:
+        return None
+    matches = HDFC_TOTAL_DUES.findall(text, dues_start)
     
     valid_amounts = []
     for match in matches:
@@ -87,8 +128,8 @@ def extract_hdfc_total_dues(text: str) -> str:
         valid_amounts.sort(reverse=True)
         return valid_amounts[0][1]
     
-    account_summary_pattern = r"Account\s+Summary[\s\S]{1,500}?Total\s+Dues[\s\S]{0,100}?([\d,]+\.[\d]{2})"
-    match = re.search(account_summary_pattern, text, re.IGNORECASE)
+    summary_start = context.first_anchor("account_summary")
+    match = HDFC_ACCOUNT_SUMMARY_DUES.search(text, summary_start) if summary_start >= 0 else None
     if match:
         amount = match.group(1)
         if float(clean_amount(amount)) > 0:
@@ -96,31 +137,34 @@ def extract_hdfc_total_dues(text: str) -> str:
     
     return None
 
-def extract_idfc_amounts(text: str) -> Dict[str, str]:
+def extract_idfc_amounts(text: str, context: DocumentContext = None) -> Dict[str, str]:
     """
     Special extraction logic for IDFC First Bank amounts.
     IDFC statements have specific format with Statement Summary section.
+    Every pattern starts at a heading, so each search begins at that
+    heading's first occurrence in the context and is skipped without one.
     """
+    context = context or DocumentContext(text)
     result = {"total_due": None, "min_payment": None}
+    total_start = context.first_anchor("total_amount_due")
+    min_start = context.first_anchor("minimum_amount_due")
     
-    
-    summary_pattern = r"Statement\s+Summary[\s\S]{1,500}?Total\s+Amount\s+Due[\s\S]{0,100}?`?\s*([\d,]+\.[\d]{2})"
-    match = re.search(summary_pattern, text, re.IGNORECASE | re.DOTALL)
-    
-    if match:
-        result["total_due"] = match.group(1)
+    summary_start = context.first_anchor("statement_summary")
+    if summary_start >= 0 and total_start >= 0:
+        match = IDFC_SUMMARY_TOTAL.search(text, summary_start)
+        if match:
+            result["total_due"] = match.group(1)
     
     
-    if result["total_due"]:
-        min_pattern = r"Minimum\s+Amount\s+Due[\s\S]{0,100}?`?\s*([\d,]+\.[\d]{2})"
-        min_match = re.search(min_pattern, text, re.IGNORECASE)
+    if result["total_due"] and min_start >= 0:
+        min_match = IDFC_MINIMUM.search(text, min_start)
         if min_match:
             result["min_payment"] = min_match.group(1)
     
     
-    if not result["total_due"] or not result["min_payment"]:
-        payment_section_pattern = r"Payment\s+Due\s+Date[\s\S]{0,200}?Total\s+Amount\s+Due[\s\S]{0,50}?`?\s*([\d,]+\.[\d]{2})[\s\S]{0,100}?Minimum\s+Amount\s+Due[\s\S]{0,50}?`?\s*([\d,]+\.[\d]{2})"
-        payment_match = re.search(payment_section_pattern, text, re.IGNORECASE | re.DOTALL)
+    section_start = context.first_anchor("payment_due_date")
+    if (not result["total_due"] or not result["min_payment"]) and min(section_start, total_start, min_start) >= 0:
+        payment_match = IDFC_PAYMENT_SECTION.search(text, section_start)
         
         if payment_match:
             if not result["total_due"]:
@@ -129,8 +173,8 @@ def extract_idfc_amounts(text: str) -> Dict[str, str]:
                 result["min_payment"] = payment_match.group(2)
     
     
-    if not result["total_due"]:
-        total_standalone = re.search(r"Total\s+Amount\s+Due\s*\n?\s*`?\s*([\d,]+\.[\d]{2})\s*(?:CR|Dr)?", text, re.IGNORECASE)
+    if not result["total_due"] and total_start >= 0:
+        total_standalone = IDFC_TOTAL_STANDALONE.search(text, total_start)
         if total_standalone:
             amount = total_standalone.group(1)
             try:
@@ -139,40 +183,43 @@ def extract_idfc_amounts(text: str) -> Dict[str, str]:
             except:
                 pass
     
-    if not result["min_payment"]:
-        min_standalone = re.search(r"Minimum\s+Amount\s+Due\s*\n?\s*`?\s*([\d,]+\.[\d]{2})", text, re.IGNORECASE)
+    if not result["min_payment"] and min_start >= 0:
+        min_standalone = IDFC_MIN_STANDALONE.search(text, min_start)
         if min_standalone:
             result["min_payment"] = min_standalone.group(1)
     
     return result
 
-def extract_with_llm(full_text: str, api_key: str) -> Dict[str, Any]:
-    """Uses Gemini LLM to extract structured data as a fallback."""
-    if not api_key or api_key == "GEMINI_API_KEY":
-        return {"llm_status": "SKIPPED", "reason": "Gemini API Key is missing or placeholder."}
-
+def build_llm_payload(full_text: str, keys: List[str] = None, known: Dict[str, str] = None) -> Dict[str, Any]:
+    """
+    Builds the generateContent request body for the fallback extraction.
+    The schema and prompt cover only `keys` (default: all five fields);
+    values RegEx already found are passed in `known` as context.
+    """
+    keys = keys or KEYS_TO_SEARCH
     response_schema = {
         "type": "OBJECT",
-        "properties": {
-            "statement_date": {"type": "STRING"},
-            "payment_due_date": {"type": "STRING"},
-            "total_due": {"type": "STRING"},
-            "min_payment": {"type": "STRING"},
-            "card_last_4_digits": {"type": "STRING"},
-        },
+        "properties": {key: {"type": "STRING"} for key in keys},
     }
 
+    field_list = ", ".join(keys)
     system_prompt = (
-        "You are an expert financial data extractor. Extract five specific fields "
-        "into strict JSON. Use only data from the text; if missing, return 'NOT_FOUND'. "
-        "For total_due, find the 'Total Amount Due' or 'Total Dues' value, NOT zero values. "
-        "Remove DR, Cr, or CR suffixes from amounts."
+        f"You are an expert financial data extractor. Extract these fields into strict JSON: {field_list}. "
+        "Use only data from the text; if missing, return 'NOT_FOUND'. "
     )
+    if "total_due" in keys:
+        system_prompt += "For total_due, find the 'Total Amount Due' or 'Total Dues' value, NOT zero values. "
+    if "total_due" in keys or "min_payment" in keys:
+        system_prompt += "Remove DR, Cr, or CR suffixes from amounts."
+
     user_query = f"Extract data from the statement text:\n---\n{full_text}\n---"
+    if known:
+        known_lines = "\n".join(f"{key}: {value}" for key, value in known.items())
+        user_query = f"Already extracted from this statement (for context):\n{known_lines}\n\n{user_query}"
 
-    payload = {
+    return {
         "contents": [{"parts": [{"text": user_query}]}],
-        "systemInstruction": {"parts": [{"text": system_prompt}]},
+        "systemInstruction": {"parts": [{"text": system_prompt.strip()}]},
         "generationConfig": {
             "responseMimeType": "application/json",
             "responseSchema": response_schema,
@@ -180,38 +227,383 @@ def extract_with_llm(full_text: str, api_key: str) -> Dict[str, Any]:
         },
     }
 
+def parse_llm_response(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Turns a generateContent response body into the llm_status result dict."""
+    if result.get('candidates'):
+        json_text = result['candidates'][0]['content']['parts'][0]['text']
+        llm_extracted_data = json.loads(json_text)
+        llm_extracted_data["llm_status"] = "SUCCESS"
+        return llm_extracted_data
+
+    return {"llm_status": "FAILED", "reason": "Empty or malformed LLM response."}
+
+def _llm_failure(error: Exception) -> Dict[str, Any]:
+    if isinstance(error, requests.exceptions.HTTPError):
+        return {"llm_status": "FAILED", "reason": f"HTTP Error: {error}"}
+    return {"llm_status": "FAILED", "reason": f"Error processing LLM response: {error}"}
+
+def _compact_context_failed(result: Dict[str, Any], keys: List[str], malformed: bool) -> bool:
+    """
+    True when a compact-context answer should be retried with the full text:
+    it left a required field missing, or its JSON did not parse. Transport
+    failures (HTTP errors, timeouts, connection errors) already went through
+    the client's retries and are not repeated.
+    """
+    if result.get("llm_status") == "SUCCESS":
+        required = [key for key in keys if key in LLM_REQUIRED_KEYS]
+        return any(result.get(key) in ["NOT_FOUND", None, ""] for key in required)
+    return malformed
+
+def extract_with_llm(full_text: str, api_key: str, client: GeminiClient = None, compact: bool = True,
+                     keys: List[str] = None, known: Dict[str, str] = None) -> Dict[str, Any]:
+    """
+    Uses Gemini LLM to extract structured data as a fallback. By default only
+    anchor windows of the text are sent; the full text is sent only if that
+    compact prompt fails. `keys` limits the request to the missing fields and
+    `known` passes the fields RegEx already found as context.
+    """
+    if not api_key or api_key == "GEMINI_API_KEY":
+        return {"llm_status": "SKIPPED", "reason": "Gemini API Key is missing or placeholder."}
+
+    client = client or get_client(api_key)
+    cache_counts = {"llm_cache_hits": 0, "llm_cache_misses": 0}
+
+    def call(text: str) -> Tuple[Dict[str, Any], bool]:
+        """(result, malformed): malformed when an answer came back but its JSON did not parse."""
+        try:
+            body, hit = client.cached_generate_content(build_llm_payload(text, keys, known))
+        except Exception as e:
+            return _llm_failure(e), False
+        cache_counts["llm_cache_hits" if hit else "llm_cache_misses"] += 1
+        try:
+            return parse_llm_response(body), False
+        except ValueError as e:
+            return _llm_failure(e), True
+        except Exception as e:
+            return _llm_failure(e), False
+
+    context = select_context(full_text) if compact else full_text
+    result, malformed = call(context)
+    result["llm_context"] = "compact" if context is not full_text else "full"
+    if context is not full_text and _compact_context_failed(result, keys or KEYS_TO_SEARCH, malformed):
+        result, _ = call(full_text)
+        result["llm_context"] = "full"
+    result.update(cache_counts)
+    return result
+
+async def aextract_with_llm(full_text: str, api_key: str, client: GeminiClient = None, compact: bool = True,
+                            keys: List[str] = None, known: Dict[str, str] = None) -> Dict[str, Any]:
+    """Async variant of extract_with_llm; many calls can be gathered under the client's concurrency limit."""
+    if not api_key or api_key == "GEMINI_API_KEY":
+        return {"llm_status": "SKIPPED", "reason": "Gemini API Key is missing or placeholder."}
+
+    client = client or get_client(api_key)
+    cache_counts = {"llm_cache_hits": 0, "llm_cache_misses": 0}
+
+    async def call(text: str) -> Tuple[Dict[str, Any], bool]:
+        try:
+            body, hit = await client.acached_generate_content(build_llm_payload(text, keys, known))
+        except Exception as e:
+            return _llm_failure(e), False
+        cache_counts["llm_cache_hits" if hit else "llm_cache_misses"] += 1
+        try:
+            return parse_llm_response(body), False
+        except ValueError as e:
+            return _llm_failure(e), True
+        except Exception as e:
+            return _llm_failure(e), False
+
+    context = select_context(full_text) if compact else full_text
+    result, malformed = await call(context)
+    result["llm_context"] = "compact" if context is not full_text else "full"
+    if context is not full_text and _compact_context_failed(result, keys or KEYS_TO_SEARCH, malformed):
+        result, _ = await call(full_text)
+        result["llm_context"] = "full"
+    result.update(cache_counts)
+    return result
+
+def _record_field_timing(timings: Dict[str, Any], key: str, start: float, source: str = None,
+                         pattern_index: int = None, region: str = None) -> None:
+    if timings is None:
+        return
+    entry = timings.setdefault("fields", {}).setdefault(
+        key, {"ms": 0.0, "source": None, "pattern_index": None, "region": None}
+    )
+    entry["ms"] = round(entry["ms"] + _elapsed_ms(start), 3)
+    if source is not None:
+        entry["source"] = source
+        entry["pattern_index"] = pattern_index
+        entry["region"] = region
+
+def _match_field(matcher, key: str, text: str, before: int = None,
+                 budget_hits: List[Dict[str, Any]] = None) -> Tuple[str, int]:
+    """
+    Returns (value, pattern_index) of the first candidate that validates, or
+    (None, None). With `before`, only patterns ranked ahead of that index
+    are tried.
+    """
+    for index, match in matcher.candidates(text, budget_hits):
+        if before is not None and index >= before:
+            break
+        value = match.group(1).strip()
+        
+        if key in ["total_due", "min_payment"]:
+            value = clean_amount(value)
+            if not value or not AMOUNT_VALUE.match(value):
+                continue
+            if key == "total_due" and float(value) == 0:
+                continue
+        
+        value = WHITESPACE_RUN.sub(' ', value).strip()
+        
+        if value:
+            return value, index
+    return None, None
+
+def extract_fields(text: str, bank_key: str, keys: List[str], timings: Dict[str, Any] = None,
+                   context: DocumentContext = None) -> Dict[str, str]:
+    """
+    Runs the bank's RegEx matchers over the text; returns only the keys found.
+    If a timings dict is given, each field's time and the source / index of
+    the winning pattern are recorded under timings["fields"], and searches
+    that overran their time budget under timings["pattern_budget_hits"].
+    Pass the document's context to share helper results with other calls
+    on the same text.
+    Pattern priority still decides: each pattern is tried in the field's
+    summary regions (see section_index) before the next pattern is, so
+    between hits of the same pattern the summary value beats a look-alike in
+    the transaction pages. The whole text is only searched when no region
+    matched; otherwise higher-priority patterns get one more try over the
+    text up to a window past the regions.
+    """
+    matchers = COMPILED_TEMPLATES.get(bank_key, {})
+    context = context or DocumentContext(text)
+    sections = context.memo("sections", lambda: SectionIndex(context))
+    found = {}
+    budget_hits: List[Dict[str, Any]] = []
+
+    for key in keys:
+        start = time.perf_counter()
+        
+        if bank_key == "hdfc" and key == "total_due":
+            hdfc_amount = context.memo("hdfc_total_dues", lambda: extract_hdfc_total_dues(text, context))
+            if hdfc_amount:
+                found[key] = clean_amount(hdfc_amount)
+                _record_field_timing(timings, key, start, "hdfc_helper")
+                continue
+        
+        
+        if bank_key == "idfc" and key in ["total_due", "min_payment"]:
+            idfc_amounts = context.memo("idfc_amounts", lambda: extract_idfc_amounts(text, context))
+            if idfc_amounts[key]:
+                found[key] = clean_amount(idfc_amounts[key])
+                _record_field_timing(timings, key, start, "idfc_helper")
+                continue
+        
+        matcher = matchers.get(key)
+        if matcher is None:
+            _record_field_timing(timings, key, start)
+            continue
+
+        winner = region = None
+        for region_name, region_text in sections.regions(bank_key, key) + [("full_text", None)]:
+            if region_text is None:
+                region_text = text if winner is None else text[:sections.window_end(bank_key, key)]
+            # Later regions only get a say through a higher-priority pattern.
+            value, index = _match_field(matcher, key, region_text, winner, budget_hits)
+            if value:
+                found[key] = value
+                winner, region = index, region_name
+                if winner == 0:
+                    break
+
+        if winner is None:
+            _record_field_timing(timings, key, start)
+        else:
+            _record_field_timing(timings, key, start, "regex", winner, region)
+
+    if budget_hits and timings is not None:
+        timings.setdefault("pattern_budget_hits", []).extend(budget_hits)
+    return found
+
+def stream_fields(pdf_file: io.BytesIO, keys: List[str], timings: Dict[str, Any] = None,
+                  backend: str = None) -> Tuple[str, str, Dict[str, str]]:
+    """
+    Pulls pages one at a time and runs the field matchers incrementally,
+    closing the PDF as soon as every key is found. Each page is searched
+    together with the tail of the previous text so matches spanning a
+    page break are still seen.
+    Returns (text_read_so_far, bank_key, found_fields).
+    """
+    pages = iter_pdf_pages(pdf_file, timings, backend)
+    chunks: List[str] = []
+    found: Dict[str, str] = {}
+    bank_key = "unknown"
+    tail = ""
+
     try:
-        api_url = API_URL_TEMPLATE + api_key
-        response = requests.post(api_url, headers={'Content-Type': 'application/json'}, json=payload)
-        response.raise_for_status()
-        result = response.json()
+        for page_text in pages:
+            chunks.append(page_text)
+
+            if bank_key == "unknown":
+                start = time.perf_counter()
+                bank_key = identify_bank(page_text)
+                if timings is not None:
+                    timings["identify_bank_ms"] = round(timings.get("identify_bank_ms", 0.0) + _elapsed_ms(start), 3)
+                if bank_key == "unknown":
+                    continue
+                window = PAGE_BREAK.join(chunks)
+            else:
+                window = tail + PAGE_BREAK + page_text
 
-        if result.get('candidates'):
-            json_text = result['candidates'][0]['content']['parts'][0]['text']
-            llm_extracted_data = json.loads(json_text)
-            llm_extracted_data["llm_status"] = "SUCCESS"
-            return llm_extracted_data
+            missing = [key for key in keys if key not in found]
+            found.update(extract_fields(window, bank_key, missing, timings))
+            if all(key in found for key in keys):
+                break
+            tail = window[-STREAM_OVERLAP_CHARS:]
+    finally:
+        pages.close()
 
-        return {"llm_status": "FAILED", "reason": "Empty or malformed LLM response."}
+    return PAGE_BREAK.join(chunks), bank_key, found
 
-    except requests.exceptions.HTTPError as err:
-        return {"llm_status": "FAILED", "reason": f"HTTP Error: {err}"}
+def extract_layout_fields(pdf_file: io.BytesIO, keys: List[str], timings: Dict[str, Any] = None) -> Tuple[str, str, Dict[str, str]]:
+    """
+    Layout-hint text stage: identifies the bank from the top strip of page 1,
+    then extracts only the LAYOUT_HINT_REGIONS with pdfplumber and
+    runs the field matchers over them. Crop times go to timings["crop_ms"].
+    Returns (region_text, bank_key, found_fields).
+    """
+    chunks: List[str] = []
+    bank_key = "unknown"
+    try:
+        start = time.perf_counter()
+        with get_backend(ACCURATE_BACKEND).open_regions(pdf_file) as crop_text:
+            if timings is not None:
+                timings["pdf_open_ms"] = round(timings.get("pdf_open_ms", 0.0) + _elapsed_ms(start), 3)
+                timings.setdefault("crop_ms", [])
+
+            def read_region(page_index: int, bbox: Tuple[float, float, float, float]) -> str:
+                crop_start = time.perf_counter()
+                text = crop_text(page_index, bbox)
+                if timings is not None:
+                    timings["crop_ms"].append(_elapsed_ms(crop_start))
+                return re.sub(r'[\r\n]+', '\n', text) + "\n" if text else ""
+
+            chunks.append(read_region(0, LAYOUT_IDENTIFY_BBOX))
+            bank_key = identify_bank(chunks[0])
+            if bank_key != "unknown":
+                for region in LAYOUT_HINT_REGIONS.values():
+                    chunks.append(read_region(region["page"], region["bbox"]))
     except Exception as e:
-        return {"llm_status": "FAILED", "reason": f"Error processing LLM response: {e}"}
+        print(f"Error during PDF region extraction: {e}", file=sys.stderr)
+
+    text = "".join(chunks)
+    found = extract_fields(text, bank_key, keys, timings) if bank_key != "unknown" else {}
+    return text, bank_key, found
+
+def _has_required_fields(bank_key: str, found: Dict[str, str]) -> bool:
+    return bank_key != "unknown" and all(key in found for key in LLM_REQUIRED_KEYS)
 
-def parse_statement(pdf_file: io.BytesIO, api_key: str = None) -> Dict[str, Any]:
-    """Main function: parses PDF with RegEx, falls back to LLM if needed."""
-    full_text = extract_text_from_pdf(pdf_file)
+def parse_statement(pdf_file: io.BytesIO, api_key: str = None, stream: bool = False, mode: str = None,
+                    layout: bool = None) -> Dict[str, Any]:
+    """
+    Main function: parses PDF with RegEx, falls back to LLM if needed.
+    With stream=True pages are read lazily and reading stops once every
+    field is found; raw_text then holds only the pages that were read.
+    `mode` picks the PDF text backend(s): "accurate", "fast" or
+    "fast-then-accurate" (default: pdf_backends.PDF_MODE).
+    With layout=True (default: LAYOUT_HINTS_ENABLED) and pdfplumber as the
+    first backend, the bank's hinted page regions are extracted first; the
+    whole document is only read when they miss a field, and raw_text then
+    holds just the region text.
+    Every result carries a "timings" breakdown of where the time went.
+    """
+    start = time.perf_counter()
+    timings: Dict[str, Any] = {}
+    backends = backends_for_mode(mode)
+    layout = LAYOUT_HINTS_ENABLED if layout is None else layout
+    if layout and backends[0] == ACCURATE_BACKEND:
+        region_text, bank_key, found = extract_layout_fields(pdf_file, KEYS_TO_SEARCH, timings)
+        timings["text_extraction_ms"] = round(timings.get("pdf_open_ms", 0.0) + sum(timings.get("crop_ms", [])), 3)
+        if bank_key != "unknown" and all(key in found for key in KEYS_TO_SEARCH):
+            timings["layout_hints"] = "HIT"
+            return _extract_stage(region_text, bank_key, found, api_key, timings, start)
+        timings["layout_hints"] = "MISS"
+
+    if stream:
+        for backend in backends:
+            if hasattr(pdf_file, "seek"):
+                pdf_file.seek(0)
+            timings.setdefault("pdf_backends", []).append(backend)
+            full_text, bank_key, found = stream_fields(pdf_file, KEYS_TO_SEARCH, timings, backend)
+            if _has_required_fields(bank_key, found):
+                break
+        timings["text_extraction_ms"] = round(
+            timings.get("pdf_open_ms", 0.0) + sum(timings.get("page_ms", [])) + sum(timings.get("crop_ms", [])), 3
+        )
+        return _extract_stage(full_text, bank_key, found, api_key, timings, start)
+
+    def read_text(backend: str) -> str:
+        if hasattr(pdf_file, "seek"):
+            pdf_file.seek(0)
+        read_start = time.perf_counter()
+        text = extract_text_from_pdf(pdf_file, timings, backend)
+        timings["text_extraction_ms"] = round(timings.get("text_extraction_ms", 0.0) + _elapsed_ms(read_start), 3)
+        return text
+
+    return parse_with_backends(read_text, backends, api_key=api_key, timings=timings, start=start)
+
+def parse_with_backends(read_text: Callable[[str], str], backends: List[str], api_key: str = None,
+                        timings: Dict[str, Any] = None, start: float = None) -> Dict[str, Any]:
+    """
+    Runs the extract stage on text from each backend in turn. The text of
+    every backend but the last is only used when it identifies the bank and
+    yields all required fields; otherwise the next backend is tried, so the
+    LLM fallback only ever sees the last (most accurate) text.
+    """
+    start = start if start is not None else time.perf_counter()
+    timings = timings if timings is not None else {}
+    for backend in backends[:-1]:
+        timings.setdefault("pdf_backends", []).append(backend)
+        full_text = read_text(backend)
+        context = DocumentContext(full_text)
+        identify_start = time.perf_counter()
+        bank_key = context.bank_key
+        timings["identify_bank_ms"] = _elapsed_ms(identify_start)
+        if bank_key == "unknown":
+            continue
+        found = extract_fields(full_text, bank_key, KEYS_TO_SEARCH, timings, context)
+        if _has_required_fields(bank_key, found):
+            return _extract_stage(full_text, bank_key, found, api_key, timings, start, context)
+
+    timings.setdefault("pdf_backends", []).append(backends[-1])
+    return parse_text(read_text(backends[-1]), api_key=api_key, timings=timings, start=start)
+
+def parse_text(full_text: str, api_key: str = None, timings: Dict[str, Any] = None, start: float = None) -> Dict[str, Any]:
+    """
+    Extract stage: identifies the bank and pulls the fields out of text that
+    was already extracted from the PDF (e.g. replayed from the text cache).
+    """
+    start = start if start is not None else time.perf_counter()
+    timings = timings if timings is not None else {}
+    context = DocumentContext(full_text)
+    identify_start = time.perf_counter()
+    bank_key = context.bank_key
+    timings["identify_bank_ms"] = _elapsed_ms(identify_start)
+    return _extract_stage(full_text, bank_key, None, api_key, timings, start, context)
+
+def _extract_stage(full_text: str, bank_key: str, found: Dict[str, str], api_key: str,
+                   timings: Dict[str, Any], start: float, context: DocumentContext = None) -> Dict[str, Any]:
     if not full_text:
-        return {"status": "FAILED", "reason": "Could not extract text from PDF."}
+        timings["total_ms"] = _elapsed_ms(start)
+        return {"status": "FAILED", "reason": "Could not extract text from PDF.", "timings": timings}
 
-    bank_key = identify_bank(full_text)
     if bank_key == "unknown":
         supported = ', '.join(k.replace('_', ' ').title() for k in REGEX_TEMPLATES.keys())
-        return {"status": "FAILED", "reason": f"Unknown issuer. Supported banks: {supported}"}
+        timings["total_ms"] = _elapsed_ms(start)
+        return {"status": "FAILED", "reason": f"Unknown issuer. Supported banks: {supported}", "timings": timings}
 
     template = REGEX_TEMPLATES.get(bank_key)
-    patterns = template["patterns"]
     bank_display_name = template["identifier"][0]
 
     extracted_data = {
@@ -221,56 +613,26 @@ def parse_statement(pdf_file: io.BytesIO, api_key: str = None) -> Dict[str, Any]
         "raw_text": full_text
     }
 
-    keys_to_search = ["statement_date", "payment_due_date", "total_due", "min_payment", "card_last_4_digits"]
+    keys_to_search = KEYS_TO_SEARCH
 
-    
+    if found is None:
+        found = extract_fields(full_text, bank_key, keys_to_search, timings, context)
     for key in keys_to_search:
-        extracted_data[key] = "NOT_FOUND"
-        
-        
-        if bank_key == "hdfc" and key == "total_due":
-            hdfc_amount = extract_hdfc_total_dues(full_text)
-            if hdfc_amount:
-                extracted_data[key] = clean_amount(hdfc_amount)
-                continue
-        
-        
-        if bank_key == "idfc" and key in ["total_due", "min_payment"]:
-            idfc_amounts = extract_idfc_amounts(full_text)
-            if idfc_amounts[key]:
-                extracted_data[key] = clean_amount(idfc_amounts[key])
-                continue
-        
-        for pattern_str in patterns.get(key, []):
-            try:
-                pattern = re.compile(pattern_str, re.IGNORECASE | re.MULTILINE | re.DOTALL)
-                match = pattern.search(full_text)
-                if match:
-                    value = match.group(1).strip()
-                    
-                    if key in ["total_due", "min_payment"]:
-                        value = clean_amount(value)
-                        if not value or not re.match(r'^\d+\.?\d*$', value):
-                            continue
-                        if key == "total_due" and float(value) == 0:
-                            continue
-                    
-                    value = re.sub(r'[\s\n]+', ' ', value).strip()
-                    
-                    if value:
-                        extracted_data[key] = value
-                        break
-            except re.error as e:
-                print(f"Regex error for key '{key}': {e}")
-                continue
+        extracted_data[key] = found.get(key, "NOT_FOUND")
 
-    
-    needs_fallback = any(extracted_data[key] == "NOT_FOUND" for key in ["total_due", "payment_due_date", "min_payment"])
+    needs_fallback = any(extracted_data[key] == "NOT_FOUND" for key in LLM_REQUIRED_KEYS)
     is_key_valid = api_key and api_key != "GEMINI_API_KEY"
 
     if needs_fallback and is_key_valid:
-        llm_results = extract_with_llm(full_text, api_key)
+        missing_keys = [key for key in keys_to_search if extracted_data[key] == "NOT_FOUND"]
+        known = {key: extracted_data[key] for key in keys_to_search if extracted_data[key] != "NOT_FOUND"}
+        llm_start = time.perf_counter()
+        llm_results = extract_with_llm(full_text, api_key, keys=missing_keys, known=known)
+        timings["llm_ms"] = _elapsed_ms(llm_start)
         extracted_data["llm_status"] = llm_results.get("llm_status", "SKIPPED")
+        extracted_data["llm_context"] = llm_results.get("llm_context", "full")
+        extracted_data["llm_cache_hits"] = llm_results.get("llm_cache_hits", 0)
+        extracted_data["llm_cache_misses"] = llm_results.get("llm_cache_misses", 0)
 
         if llm_results.get("llm_status") == "SUCCESS":
             extracted_data["extraction_method"] = "RegEx/LLM Fallback"
@@ -291,4 +653,6 @@ def parse_statement(pdf_file: io.BytesIO, api_key: str = None) -> Dict[str, Any]
         extracted_data["llm_status"] = "SKIPPED"
         extracted_data["llm_error"] = "Gemini API Key missing or placeholder."
 
+    timings["total_ms"] = _elapsed_ms(start)
+    extracted_data["timings"] = timings
     return extracted_data
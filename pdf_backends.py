@@ -0,0 +1,174 @@
+import io
+import os
+import sys
+from contextlib import contextmanager
+from functools import partial
+from importlib import metadata
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import pdfplumber
+
+try:
+    import pypdfium2
+except ImportError:
+    pypdfium2 = None
+
+try:
+    # pdfminer.six is a pdfplumber dependency, so this is normally present.
+    import pdfminer
+    from pdfminer.converter import TextConverter
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+except ImportError:
+    pdfminer = None
+
+ACCURATE_BACKEND = "pdfplumber"
+PDF_MODES = ["accurate", "fast", "fast-then-accurate"]
+
+# "accurate" keeps pdfplumber for every document; "fast" uses the fastest
+# installed engine; "fast-then-accurate" re-extracts with pdfplumber only
+# when the fast text leaves a required field missing.
+PDF_MODE = os.getenv("CREDITCARD_INTEL_PDF_MODE", "accurate").lower()
+
+# Extract the LAYOUT_HINT_REGIONS with pdfplumber before whole pages.
+LAYOUT_HINTS_ENABLED = os.getenv("CREDITCARD_INTEL_LAYOUT_HINTS", "0").lower() in ("1", "true", "yes")
+
+PageTexts = List[Callable[[], str]]
+
+
+def _package_version(distribution: str) -> str:
+    try:
+        return metadata.version(distribution)
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+class PdfplumberBackend:
+    """pdfplumber's layout-aware extract_text; the reference the templates were written against."""
+
+    name = "pdfplumber"
+    version = f"pdfplumber-{getattr(pdfplumber, '__version__', 'unknown')}"
+
+    @staticmethod
+    def _page_text(page) -> str:
+        # Drop the page's parsed objects once its text is out, so memory stays
+        # flat however many pages a statement has.
+        try:
+            return page.extract_text()
+        finally:
+            page.close()
+
+    @contextmanager
+    def open(self, pdf_file: io.BytesIO) -> Iterator[PageTexts]:
+        with pdfplumber.open(pdf_file) as pdf:
+            yield [partial(self._page_text, page) for page in pdf.pages]
+
+    @staticmethod
+    def _crop_text(pdf, page_index: int, bbox: Tuple[float, float, float, float]) -> str:
+        if page_index >= len(pdf.pages):
+            return ""
+        page = pdf.pages[page_index]
+        x0, top, x1, bottom = page.bbox
+        width, height = x1 - x0, bottom - top
+        region = (x0 + bbox[0] * width, top + bbox[1] * height, x0 + bbox[2] * width, top + bbox[3] * height)
+        return page.crop(region).extract_text() or ""
+
+    @contextmanager
+    def open_regions(self, pdf_file: io.BytesIO) -> Iterator[Callable[[int, Tuple[float, float, float, float]], str]]:
+        """
+        Yields crop_text(page_index, bbox): the text inside a box given as
+        (x0, top, x1, bottom) fractions of the page, "" past the last page.
+        Layout analysis then only runs over the characters in the crop.
+        """
+        with pdfplumber.open(pdf_file) as pdf:
+            yield partial(self._crop_text, pdf)
+
+
+class Pypdfium2Backend:
+    """PDFium's native text extraction; several times faster than pdfplumber."""
+
+    name = "pypdfium2"
+    version = f"pypdfium2-{_package_version('pypdfium2')}"
+
+    @staticmethod
+    def _page_text(pdf, index: int) -> str:
+        page = pdf[index]
+        try:
+            text_page = page.get_textpage()
+            try:
+                return text_page.get_text_range()
+            finally:
+                text_page.close()
+        finally:
+            page.close()
+
+    @contextmanager
+    def open(self, pdf_file: io.BytesIO) -> Iterator[PageTexts]:
+        pdf = pypdfium2.PdfDocument(pdf_file)
+        try:
+            yield [partial(self._page_text, pdf, index) for index in range(len(pdf))]
+        finally:
+            pdf.close()
+
+
+class PdfminerBackend:
+    """
+    pdfminer's TextConverter with advanced layout analysis turned off
+    (boxes_flow=None), which keeps line order and skips the costly
+    text-box grouping pass that pdfplumber's output goes through.
+    """
+
+    name = "pdfminer"
+    version = f"pdfminer-{_package_version('pdfminer.six')}"
+
+    def __init__(self, laparams: "LAParams" = None):
+        self.laparams = laparams or LAParams(boxes_flow=None, detect_vertical=False, all_texts=False)
+
+    @staticmethod
+    def _page_text(interpreter, out: io.StringIO, page) -> str:
+        out.seek(0)
+        out.truncate(0)
+        interpreter.process_page(page)
+        return out.getvalue().replace("\x0c", "")
+
+    @contextmanager
+    def open(self, pdf_file: io.BytesIO) -> Iterator[PageTexts]:
+        out = io.StringIO()
+        device = TextConverter(PDFResourceManager(caching=True), out, laparams=self.laparams)
+        interpreter = PDFPageInterpreter(device.rsrcmgr, device)
+        try:
+            yield [partial(self._page_text, interpreter, out, page) for page in PDFPage.get_pages(pdf_file)]
+        finally:
+            device.close()
+
+
+PDF_BACKENDS: Dict[str, object] = {ACCURATE_BACKEND: PdfplumberBackend()}
+if pypdfium2 is not None:
+    PDF_BACKENDS["pypdfium2"] = Pypdfium2Backend()
+if pdfminer is not None:
+    PDF_BACKENDS["pdfminer"] = PdfminerBackend()
+
+# Fastest installed engine first.
+FAST_BACKEND: Optional[str] = next((name for name in ("pypdfium2", "pdfminer") if name in PDF_BACKENDS), None)
+
+
+def get_backend(name: str = None):
+    """Returns the named backend (default pdfplumber); unknown names fall back to pdfplumber."""
+    backend = PDF_BACKENDS.get(name or ACCURATE_BACKEND)
+    if backend is None:
+        print(f"PDF backend '{name}' is not available; using {ACCURATE_BACKEND}", file=sys.stderr)
+        backend = PDF_BACKENDS[ACCURATE_BACKEND]
+    return backend
+
+
+def backends_for_mode(mode: str = None) -> List[str]:
+    """Backends to try, in order, for a PDF mode; fast modes degrade to pdfplumber when no fast engine is installed."""
+    mode = (mode or PDF_MODE).lower()
+    if mode not in PDF_MODES:
+        print(f"Unknown PDF mode '{mode}'; using accurate", file=sys.stderr)
+        mode = "accurate"
+    if mode == "accurate" or FAST_BACKEND is None:
+        return [ACCURATE_BACKEND]
+    if mode == "fast":
+        return [FAST_BACKEND]
+    return [FAST_BACKEND, ACCURATE_BACKEND]
@@ -258,3 +258,64 @@ REGEX_TEMPLATES = {
         },
     },
 }
+
+
+# Page regions read first when layout hints are enabled: text is extracted
+# from these crops and from full pages only on a miss. Boxes are (x0, top,
+# x1, bottom) as fractions of the page size, so they hold across page sizes;
+# "page" is 0-based. The bank is identified from the LAYOUT_IDENTIFY_BBOX
+# strip. One generic set serves every bank: all supported issuers print the
+# card header and account summary in the top third of page 1, and the boxes
+# have not been measured per bank. A bank whose summary falls outside them
+# just misses and is read in full.
+LAYOUT_IDENTIFY_BBOX = (0.0, 0.0, 1.0, 0.2)
+
+LAYOUT_HINT_REGIONS = {
+    "card_header": {"page": 0, "bbox": (0.0, 0.0, 1.0, 0.15)},
+    "summary": {"page": 0, "bbox": (0.0, 0.05, 1.0, 0.35)},
+}
+
+
+# Transaction listing rows: one line per row, date first, amount last with an
+# optional Dr/Cr marker (no marker means a debit). Patterns run per page with
+# the template flags, so "." never appears: [^\n] keeps a row on its line.
+TRANSACTION_DATE = (
+    r"\d{1,2}[\/\-\.]\d{1,2}[\/\-\.]\d{2,4}"
+    r"|\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*,?\s+\d{2,4}"
+)
+TRANSACTION_ROW = (
+    r"^[ \t]*(?P<date>" + TRANSACTION_DATE + r")[ \t]+(?P<description>[^\n]*?\S)[ \t]+"
+    r"(?:Rs\.?|INR|₹|`)?[ \t]*(?P<amount>[\d,]+\.\d{2})[ \t]*(?P<direction>Dr|Cr)?[ \t]*$"
+)
+
+# Transaction table settings: "default", plus an entry for each bank whose
+# table differs from it. "row_patterns" are tried in order on each page;
+# rows whose description matches a "skip_descriptions" entry (balance and
+# total lines printed inside the table) are dropped.
+TRANSACTION_TABLES = {
+    "default": {
+        "row_patterns": [TRANSACTION_ROW],
+        "skip_descriptions": [r"^(?:Opening|Closing)\s+Balance", r"^Total\s+(?:Dues|Amount|Spends?|Purchases?|Payments?)\b"],
+    },
+    "axis": {
+        "row_patterns": [TRANSACTION_ROW],
+        "skip_descriptions": [r"^(?:Opening|Closing)\s+Balance", r"^Total\s+(?:Dues|Amount|Spends?|Purchases?|Payments?)\b", r"^End\s+of\s+Statement"],
+    },
+    "idfc": {
+        "row_patterns": [TRANSACTION_ROW],
+        "skip_descriptions": [r"^(?:Opening|Closing)\s+Balance", r"^Total\s+(?:Dues|Amount|Spends?|Purchases?|Payments?)\b", r"^Purchases?\s*&\s*Other\s+Charges"],
+    },
+}
+
+
+# strftime formats tried, in order, when normalizing a bank's dates to ISO.
+# Separators are unified to "/" and whitespace collapsed before parsing, and
+# every bank prints day-first dates.
+DATE_FORMAT_HINTS = {
+    "default": ["%d/%m/%Y", "%d/%m/%y", "%d %b %Y", "%d %B %Y", "%d %b %y", "%b %d %Y", "%B %d %Y"],
+    "hdfc": ["%d/%m/%Y", "%d/%m/%y"],
+    "axis": ["%d/%m/%Y", "%d/%m/%y", "%d %b %Y"],
+    "icici": ["%d/%m/%Y", "%d %B %Y", "%d %b %Y", "%B %d %Y"],
+    "idfc": ["%d/%m/%Y", "%d %b %y", "%d %b %Y"],
+    "yes": ["%d/%m/%Y", "%d/%m/%y"],
+}
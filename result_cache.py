@@ -0,0 +1,179 @@
+import io
+import json
+import os
+import sqlite3
+import sys
+import time
+from contextlib import closing
+from typing import Dict, Any, List, Optional
+from regex_patterns import REGEX_TEMPLATES, LAYOUT_HINT_REGIONS
+from parser import parse_statement, parse_with_backends, PARSER_VERSION
+from pdf_backends import ACCURATE_BACKEND, LAYOUT_HINTS_ENABLED, backends_for_mode
+from text_cache import TextCache, cached_extract_text
+from cache_utils import CACHE_DIR, evict_lru, sha256_hex
+
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_MAX_AGE_SECONDS = 30 * 24 * 3600
+
+
+def template_fingerprints(templates: Dict[str, dict] = REGEX_TEMPLATES) -> Dict[str, str]:
+    """
+    One fingerprint per bank, plus "unknown" for documents no bank claimed.
+    Identifiers affect routing for every bank, so they feed into all of them;
+    a pattern or layout hint edit only changes the fingerprint of the bank it
+    belongs to.
+    """
+    identifiers = {k: t.get("identifier", []) for k, t in templates.items()}
+    routing = sha256_hex(json.dumps(identifiers, sort_keys=True).encode("utf-8"))
+    fingerprints = {"unknown": sha256_hex(f"{PARSER_VERSION}:{routing}".encode("utf-8"))}
+    for bank_key, template in templates.items():
+        body = json.dumps([template, LAYOUT_HINT_REGIONS], sort_keys=True, ensure_ascii=False)
+        fingerprints[bank_key] = sha256_hex(f"{PARSER_VERSION}:{routing}:{body}".encode("utf-8"))
+    return fingerprints
+
+
+def bank_key_for_result(result: Dict[str, Any], templates: Dict[str, dict] = REGEX_TEMPLATES) -> str:
+    bank_name = result.get("bank_name")
+    for bank_key, template in templates.items():
+        if template.get("identifier", [None])[0] == bank_name:
+            return bank_key
+    return "unknown"
+
+
+class ResultCache:
+    """
+    Content-addressed on-disk cache of parse_statement results, keyed by the
+    SHA-256 of the PDF bytes and the parse options. Each entry records the
+    fingerprint of the template it was parsed with and is dropped on lookup
+    once that fingerprint changes. Size and age limits are enforced with
+    least-recently-used eviction.
+    """
+
+    def __init__(self, path: str = None, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_BYTES, max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS):
+        if path is None:
+            path = os.path.join(CACHE_DIR, "results.sqlite3")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.fingerprints = template_fingerprints()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY, bank_key TEXT, fingerprint TEXT, result TEXT,"
+                " size INTEGER, created REAL, accessed REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def make_key(pdf_hash: str, llm_enabled: bool, stream: bool = False, backends: List[str] = None,
+                 layout: bool = False) -> str:
+        key = f"{pdf_hash}:llm={int(llm_enabled)}:stream={int(stream)}"
+        if backends and backends != [ACCURATE_BACKEND]:
+            key += f":pdf={'+'.join(backends)}"
+        if layout:
+            key += ":layout=1"
+        return key
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT bank_key, fingerprint, result, created FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            bank_key, fingerprint, result, created = row
+            expired = self.max_age_seconds is not None and now - created > self.max_age_seconds
+            if expired or self.fingerprints.get(bank_key) != fingerprint:
+                conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+        return json.loads(result)
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        bank_key = bank_key_for_result(result)
+        payload = json.dumps(result, ensure_ascii=False)
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, bank_key, self.fingerprints[bank_key], payload, len(payload), now, now),
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        if self.max_age_seconds is not None:
+            conn.execute("DELETE FROM results WHERE created < ?", (now - self.max_age_seconds,))
+        evict_lru(conn, "results", self.max_entries, self.max_bytes)
+
+    def invalidate_stale(self) -> int:
+        """Deletes every entry whose template fingerprint no longer matches."""
+        removed = 0
+        with closing(self._connect()) as conn, conn:
+            for key, bank_key, fingerprint in conn.execute(
+                "SELECT key, bank_key, fingerprint FROM results"
+            ).fetchall():
+                if self.fingerprints.get(bank_key) != fingerprint:
+                    conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                    removed += 1
+        return removed
+
+    def clear(self) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM results")
+
+
+def cached_parse_statement(pdf_bytes: bytes, api_key: str = None, cache: ResultCache = None,
+                           stream: bool = False, text_cache: TextCache = None,
+                           pdf_mode: str = None, layout: bool = None) -> Dict[str, Any]:
+    """
+    parse_statement with a ResultCache in front of it. Transient LLM failures
+    are not cached. With a text_cache the PDF text stage is cached separately,
+    per backend, so a template change only re-runs the extract stage (stream
+    and layout are ignored).
+    """
+    pdf_hash = sha256_hex(pdf_bytes)
+    backends = backends_for_mode(pdf_mode)
+    layout = LAYOUT_HINTS_ENABLED if layout is None else layout
+    layout = layout and text_cache is None and backends[0] == ACCURATE_BACKEND
+
+    def run_parse() -> Dict[str, Any]:
+        if text_cache is not None:
+            return parse_with_backends(
+                lambda backend: cached_extract_text(pdf_bytes, text_cache, pdf_hash, backend), backends, api_key=api_key
+            )
+        return parse_statement(io.BytesIO(pdf_bytes), api_key=api_key, stream=stream, mode=pdf_mode, layout=layout)
+
+    if cache is None:
+        return run_parse()
+
+    llm_enabled = bool(api_key and api_key != "GEMINI_API_KEY")
+    key = cache.make_key(pdf_hash, llm_enabled, stream and text_cache is None, backends, layout)
+    try:
+        cached = cache.get(key)
+    except sqlite3.Error as e:
+        print(f"Result cache read failed: {e}", file=sys.stderr)
+        cached = None
+    if cached is not None:
+        # The stored timings describe the original parse, not this lookup.
+        cached.pop("timings", None)
+        cached["cache_status"] = "HIT"
+        return cached
+
+    result = run_parse()
+    if result.get("llm_status") != "FAILED":
+        try:
+            cache.put(key, result)
+        except sqlite3.Error as e:
+            print(f"Result cache write failed: {e}", file=sys.stderr)
+    result["cache_status"] = "MISS"
+    return result
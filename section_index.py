@@ -0,0 +1,98 @@
+from typing import Dict, List, Tuple
+from document_context import DocumentContext
+
+HEADER_CHARS = 2000
+MAX_OCCURRENCES = 3
+# After a regional hit, a higher-priority pattern may still overrule it from
+# this far past the field's last region (a summary printed in two parts),
+# but not from the transaction pages further on.
+RETRY_WINDOW_CHARS = 3000
+
+# Section name -> (DocumentContext anchor, chars kept before it, chars kept after it).
+SECTION_ANCHORS = {
+    "account_summary": ("account_summary", 0, 1200),
+    "statement_summary": ("statement_summary", 0, 1200),
+    "payment_due": ("payment_due_date", 300, 600),
+}
+
+# Ordered regions searched before the whole text; sections a document does
+# not have are skipped.
+FIELD_SECTIONS = {
+    "statement_date": ["header"],
+    "payment_due_date": ["payment_due", "header"],
+    "total_due": ["account_summary", "statement_summary", "payment_due"],
+    "min_payment": ["account_summary", "statement_summary", "payment_due"],
+    "card_last_4_digits": ["header"],
+}
+
+BANK_FIELD_SECTIONS = {
+    "hdfc": {
+        "total_due": ["account_summary", "payment_due"],
+        "min_payment": ["account_summary", "payment_due"],
+    },
+    "idfc": {
+        "total_due": ["statement_summary", "payment_due"],
+        "min_payment": ["statement_summary", "payment_due"],
+    },
+}
+
+
+class SectionIndex:
+    """
+    Locates the summary regions of one statement from the context's anchor
+    positions. Each region is widened to whole lines so a value is never
+    cut in half at its edge. Spans are computed once per section.
+    """
+
+    def __init__(self, context: DocumentContext):
+        self.context = context
+        self._spans: Dict[str, List[Tuple[int, int]]] = {}
+
+    def _line_span(self, start: int, end: int) -> Tuple[int, int]:
+        text = self.context.text
+        start = text.rfind("\n", 0, max(0, start)) + 1
+        end = text.find("\n", min(len(text), end))
+        return start, len(text) if end < 0 else end
+
+    def spans(self, section: str) -> List[Tuple[int, int]]:
+        """(start, end) offsets of the section's regions in document order."""
+        spans = self._spans.get(section)
+        if spans is None:
+            spans = []
+            if section == "header":
+                spans.append(self._line_span(0, HEADER_CHARS))
+            elif section in SECTION_ANCHORS:
+                anchor, before, after = SECTION_ANCHORS[section]
+                for position in self.context.anchors(anchor, MAX_OCCURRENCES):
+                    span = self._line_span(position - before, position + after)
+                    if span not in spans:
+                        spans.append(span)
+            self._spans[section] = spans
+        return spans
+
+    def _field_spans(self, bank_key: str, field: str) -> List[Tuple[str, int, int]]:
+        text = self.context.text
+        sections = BANK_FIELD_SECTIONS.get(bank_key, {}).get(field, FIELD_SECTIONS.get(field, []))
+        spans = []
+        seen = set()
+        for section in sections:
+            for start, end in self.spans(section):
+                if (start, end) in seen or (start == 0 and end >= len(text)):
+                    continue
+                seen.add((start, end))
+                spans.append((section, start, end))
+        return spans
+
+    def regions(self, bank_key: str, field: str) -> List[Tuple[str, str]]:
+        """
+        (section_name, region_text) pairs to search for the field, in order,
+        before falling back to the whole text. A region that already covers
+        the whole text is left out.
+        """
+        text = self.context.text
+        return [(section, text[start:end]) for section, start, end in self._field_spans(bank_key, field)]
+
+    def window_end(self, bank_key: str, field: str) -> int:
+        """Offset RETRY_WINDOW_CHARS past the field's last region, at a line end."""
+        ends = [end for _, _, end in self._field_spans(bank_key, field)]
+        return self._line_span(0, max(ends, default=0) + RETRY_WINDOW_CHARS)[1]
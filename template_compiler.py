@@ -0,0 +1,300 @@
+import os
+import re
+import sys
+import time
+from typing import Any, Dict, List, Iterator, Tuple, Pattern, Optional
+from regex_patterns import REGEX_TEMPLATES
+
+try:
+    import regex as regex_module
+except ImportError:
+    regex_module = None
+
+try:
+    import re2
+    RE2_OPTIONS = re2.Options()
+    RE2_OPTIONS.log_errors = False
+except (ImportError, AttributeError):
+    # Missing, or a different package named re2 without google-re2's Options.
+    re2 = None
+
+PATTERN_FLAGS = re.IGNORECASE | re.MULTILINE | re.DOTALL
+# RE2 takes the same flags inline.
+RE2_FLAG_PREFIX = "(?ims)"
+# re's \s and \d are Unicode-aware on str patterns, RE2's are ASCII-only;
+# patterns are rewritten with these classes so "Payment\s+Due" still
+# matches a non-breaking space on either engine.
+RE2_SPACE = r"\s\p{Z}\x{85}\x{1c}-\x{1f}"
+RE2_DIGIT = r"\p{Nd}"
+
+# "auto" uses RE2 (linear time) for every pattern it accepts when google-re2
+# is installed and falls back to the backtracking engine for the rest
+# (lookbehinds, backreferences, classes RE2 reads differently). "re" forces
+# the backtracking engine; "re2" behaves like auto but warns when the
+# package is missing. Backtracking patterns run on the `regex` module when
+# it is installed (see PATTERN_TIME_BUDGET_MS), else on re.
+REGEX_ENGINE = os.getenv("CREDITCARD_INTEL_REGEX_ENGINE", "auto").lower()
+
+# Per-search time budget. Backtracking searches run on the `regex` module,
+# which aborts them at the budget; that search then counts as a miss. Where
+# a search cannot be aborted (RE2, or plain re without `regex`) it finishes
+# and its result stands. Either way the overrun is reported to the caller.
+PATTERN_TIME_BUDGET_MS = float(os.getenv("CREDITCARD_INTEL_PATTERN_BUDGET_MS", "50"))
+
+if REGEX_ENGINE == "re2" and re2 is None:
+    print("CREDITCARD_INTEL_REGEX_ENGINE=re2 but google-re2 is not installed; using re", file=sys.stderr)
+
+
+def _re2_pattern(pattern_str: str) -> str:
+    r"""
+    Rewrites \s, \S and \d to the Unicode classes re gives them. Raises
+    ValueError for escapes RE2 reads differently that have no rewrite here.
+    """
+    out: List[str] = []
+    in_class = False
+    i = 0
+    while i < len(pattern_str):
+        char = pattern_str[i]
+        if char == "\\" and i + 1 < len(pattern_str):
+            escape = pattern_str[i + 1]
+            i += 2
+            if escape == "s":
+                out.append(RE2_SPACE if in_class else f"[{RE2_SPACE}]")
+            elif escape == "d":
+                out.append(RE2_DIGIT)
+            elif escape == "S" and not in_class:
+                out.append(f"[^{RE2_SPACE}]")
+            elif escape in "SDwWbB":
+                raise ValueError(f"\\{escape} is ASCII-only in RE2")
+            else:
+                out.append(char + escape)
+            continue
+        if not in_class and pattern_str.startswith(("[\\s\\S]", "[\\S\\s]"), i):
+            # Any character, on either engine.
+            out.append(pattern_str[i:i + 6])
+            i += 6
+            continue
+        out.append(char)
+        i += 1
+        if in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+            # A leading "^" negates; a "]" right after it (or "[") is literal.
+            if pattern_str[i:i + 1] == "^":
+                out.append("^")
+                i += 1
+            if pattern_str[i:i + 1] == "]":
+                out.append("]")
+                i += 1
+    return "".join(out)
+
+
+def compile_pattern(pattern_str: str, engine: str = REGEX_ENGINE) -> Tuple[object, str, str]:
+    """
+    Compiles one template pattern with PATTERN_FLAGS semantics and returns
+    (compiled, engine_name, fallback_reason). RE2 rejects lookaround and
+    backreferences; those patterns fall back to re with RE2's error as the
+    reason. Raises re.error when re cannot compile the pattern either.
+    """
+    reason = ""
+    if engine != "re" and re2 is not None:
+        try:
+            return re2.compile(RE2_FLAG_PREFIX + _re2_pattern(pattern_str), RE2_OPTIONS), "re2", ""
+        except re2.error as e:
+            detail = e.args[0] if e.args else type(e).__name__
+            reason = detail.decode("utf-8", "replace") if isinstance(detail, bytes) else str(detail)
+        except ValueError as e:
+            reason = str(e)
+    elif engine != "re":
+        reason = "google-re2 not installed"
+    return re.compile(pattern_str, PATTERN_FLAGS), "re", reason
+
+
+class PatternBudgetExceeded(Exception):
+    """Raised when a budgeted search is aborted at its budget."""
+
+
+class BudgetedPattern:
+    """
+    A compiled pattern with a per-search time budget. search()/match()
+    behave like the re.Pattern methods but raise PatternBudgetExceeded when
+    the search was aborted (regex module). Nothing carries over between
+    searches: every search over budget, aborted or not, is appended to the
+    `budget_hits` list the caller passes, so each document records its own.
+    """
+
+    def __init__(self, label: str, pattern: Pattern, budget_ms: float = PATTERN_TIME_BUDGET_MS,
+                 engine: str = "re", fallback_reason: str = ""):
+        self.label = label
+        self.pattern = pattern
+        self.engine = engine
+        self.fallback_reason = fallback_reason
+        self.budget_ms = budget_ms
+        self._timeout_pattern = None
+        if engine == "re" and regex_module is not None and budget_ms:
+            try:
+                self._timeout_pattern = regex_module.compile(
+                    pattern.pattern, regex_module.IGNORECASE | regex_module.MULTILINE | regex_module.DOTALL
+                )
+            except regex_module.error:
+                self._timeout_pattern = None
+        if self._timeout_pattern is not None:
+            self.engine = "regex"
+
+    @property
+    def groups(self) -> int:
+        return self.pattern.groups
+
+    def _overrun(self, budget_hits: List[Dict[str, Any]], elapsed_ms: float, aborted: bool) -> None:
+        if budget_hits is not None:
+            budget_hits.append({"pattern": self.label, "ms": round(elapsed_ms, 3), "aborted": aborted})
+
+    def _run(self, method: str, text: str, pos: int, budget_hits: List[Dict[str, Any]] = None):
+        if not self.budget_ms:
+            return getattr(self.pattern, method)(text, pos)
+
+        start = time.perf_counter()
+        if self._timeout_pattern is not None:
+            try:
+                result = getattr(self._timeout_pattern, method)(text, pos, timeout=self.budget_ms / 1000.0)
+            except TimeoutError:
+                self._overrun(budget_hits, (time.perf_counter() - start) * 1000, True)
+                raise PatternBudgetExceeded(self.label)
+        else:
+            result = getattr(self.pattern, method)(text, pos)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if elapsed_ms > self.budget_ms:
+            self._overrun(budget_hits, elapsed_ms, False)
+        return result
+
+    def search(self, text: str, pos: int = 0, budget_hits: List[Dict[str, Any]] = None):
+        return self._run("search", text, pos, budget_hits)
+
+    def match(self, text: str, pos: int = 0, budget_hits: List[Dict[str, Any]] = None):
+        return self._run("match", text, pos, budget_hits)
+
+
+class FieldMatcher:
+    """
+    Precompiled, ordered pattern list for one field of one bank.
+    The first pattern in the list still wins; a merged alternation of all
+    patterns is scanned once first so a field that cannot match anywhere
+    costs a single pass instead of one pass per pattern.
+    Patterns that do not compile are skipped; `indices` keeps each compiled
+    pattern's position in the template so reported indices never shift,
+    and `errors` maps the skipped positions to their compile errors.
+    """
+
+    def __init__(self, field: str, pattern_strs: List[str], bank_key: str = "",
+                 budget_ms: float = PATTERN_TIME_BUDGET_MS):
+        self.field = field
+        self.pattern_strs: List[str] = []
+        self.patterns: List[BudgetedPattern] = []
+        self.indices: List[int] = []
+        self.errors: Dict[int, str] = {}
+        for index, pattern_str in enumerate(pattern_strs):
+            try:
+                compiled, engine, reason = compile_pattern(pattern_str)
+            except re.error as e:
+                print(f"Regex error for {bank_key} key '{field}' pattern {index}: {e}", file=sys.stderr)
+                self.errors[index] = str(e)
+                continue
+            self.patterns.append(BudgetedPattern(f"{bank_key}.{field}[{index}]", compiled, budget_ms,
+                                                 engine=engine, fallback_reason=reason))
+            self.pattern_strs.append(pattern_str)
+            self.indices.append(index)
+
+        self.merged: Optional[BudgetedPattern] = None
+        self.group_offsets: List[int] = []
+        if len(self.patterns) > 1:
+            offset = 1
+            for pattern in self.patterns:
+                self.group_offsets.append(offset)
+                offset += pattern.groups + 1
+            merged_str = "|".join(f"({p})" for p in self.pattern_strs)
+            try:
+                compiled, engine, reason = compile_pattern(merged_str)
+                self.merged = BudgetedPattern(f"{bank_key}.{field}[merged]", compiled, budget_ms,
+                                              engine=engine, fallback_reason=reason)
+            except re.error:
+                self.merged = None
+
+    def _per_pattern(self, text: str, start: int = 0, winner: int = None,
+                     budget_hits: List[Dict[str, Any]] = None) -> Iterator[Tuple[int, re.Match]]:
+        for position, pattern in enumerate(self.patterns):
+            try:
+                if position == winner:
+                    match = pattern.match(text, start, budget_hits)
+                else:
+                    match = pattern.search(text, start, budget_hits)
+            except PatternBudgetExceeded:
+                continue
+            if match:
+                yield self.indices[position], match
+
+    def candidates(self, text: str, budget_hits: List[Dict[str, Any]] = None) -> Iterator[Tuple[int, re.Match]]:
+        """
+        Yields (pattern_index, match) in priority order, lazily; the index
+        is the pattern's position in the template.
+        No pattern can match before the merged scan's first hit, so every
+        per-pattern search starts there, and the alternative that produced
+        the hit is re-anchored in place rather than searched again. A
+        search aborted at its time budget is treated as not matching; every
+        search over budget is appended to `budget_hits`.
+        """
+        if not text or not self.patterns:
+            return
+        if self.merged is None:
+            yield from self._per_pattern(text, budget_hits=budget_hits)
+            return
+
+        try:
+            first = self.merged.search(text, 0, budget_hits)
+        except PatternBudgetExceeded:
+            # The merged gate is only a shortcut; fall back to the individual patterns.
+            yield from self._per_pattern(text, budget_hits=budget_hits)
+            return
+        if not first:
+            return
+        winner = next(i for i, g in enumerate(self.group_offsets) if first.group(g) is not None)
+        yield from self._per_pattern(text, first.start(), winner, budget_hits)
+
+
+def compile_templates(templates: Dict[str, dict]) -> Dict[str, Dict[str, FieldMatcher]]:
+    """Turns each bank's `patterns` dict into per-field FieldMatcher objects."""
+    compiled = {}
+    for bank_key, template in templates.items():
+        compiled[bank_key] = {
+            field: FieldMatcher(field, pattern_strs, bank_key)
+            for field, pattern_strs in template.get("patterns", {}).items()
+        }
+    return compiled
+
+
+COMPILED_TEMPLATES = compile_templates(REGEX_TEMPLATES)
+
+
+def engine_report(compiled: Dict[str, Dict[str, FieldMatcher]] = None) -> List[Dict[str, str]]:
+    """
+    One row per template pattern (and merged gate) naming the engine it runs
+    on (re2, regex or re), by template index. Patterns no engine compiles are listed with
+    engine "none" and the compile error as the reason.
+    """
+    rows = []
+    for bank_key, fields in (compiled or COMPILED_TEMPLATES).items():
+        for field, matcher in fields.items():
+            entries = [(i, p.engine, p.fallback_reason) for i, p in zip(matcher.indices, matcher.patterns)]
+            entries += [(i, "none", error) for i, error in matcher.errors.items()]
+            entries.sort()
+            if matcher.merged is not None:
+                entries.append(("merged", matcher.merged.engine, matcher.merged.fallback_reason))
+            for index, engine, reason in entries:
+                rows.append({
+                    "bank": bank_key,
+                    "field": field,
+                    "pattern_index": str(index),
+                    "engine": engine,
+                    "fallback_reason": reason,
+                })
+    return rows
@@ -0,0 +1,51 @@
+import io
+import pytest
+import batch
+from benchmarks.synthetic import generate_statement_pdf
+from text_cache import TextCache
+from transactions import iter_transactions
+
+
+@pytest.fixture
+def statement(tmp_path):
+    pytest.importorskip("pdfplumber")
+    path = tmp_path / "axis.pdf"
+    path.write_bytes(generate_statement_pdf("axis", pages=3, transactions=40, seed=3)[0])
+    return path
+
+
+@pytest.mark.parametrize("text_cache", [False, True])
+def test_transaction_rows_keep_their_pages(tmp_path, statement, monkeypatch, text_cache):
+    if text_cache:
+        monkeypatch.setattr(batch, "_worker_text_cache", TextCache(str(tmp_path / "texts.sqlite3")))
+    expected = [row._asdict() for row in iter_transactions(io.BytesIO(statement.read_bytes()))]
+    for _ in range(2 if text_cache else 1):
+        result = batch.parse_file(str(statement), transactions=True)
+        assert result["status"] == "SUCCESS"
+        assert result["transactions"] == expected
+    assert {row["page"] for row in expected} == {1, 2}
+
+
+@pytest.mark.parametrize("values, pct, expected", [
+    ([1, 2, 3], 50, 2),
+    ([1, 2, 3, 4, 5], 90, 5),
+    ([1, 2, 3, 4, 5], 50, 3),
+    (list(range(1, 21)), 95, 19),
+    (list(range(1, 101)), 7, 7),
+    ([4.0], 99, 4.0),
+    ([], 50, 0.0),
+])
+def test_percentile_is_nearest_rank(values, pct, expected):
+    assert batch.percentile(values, pct) == expected
+
+
+@pytest.mark.parametrize("flags, expected", [([], False), (["--layout-hints"], True), (["--no-layout-hints"], False)])
+def test_layout_hints_flag(monkeypatch, flags, expected):
+    monkeypatch.setattr(batch, "LAYOUT_HINTS_ENABLED", False)
+    assert batch.build_arg_parser().parse_args(["dir"] + flags).layout_hints is expected
+
+
+def test_layout_hints_flag_can_turn_the_env_default_off(monkeypatch):
+    monkeypatch.setattr(batch, "LAYOUT_HINTS_ENABLED", True)
+    assert batch.build_arg_parser().parse_args(["dir"]).layout_hints is True
+    assert batch.build_arg_parser().parse_args(["dir", "--no-layout-hints"]).layout_hints is False
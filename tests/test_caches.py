@@ -0,0 +1,71 @@
+import time
+import pytest
+import text_cache
+from llm_cache import LLMResponseCache
+from text_cache import TextCache
+
+PAYLOAD = {"contents": [{"parts": [{"text": "statement"}]}]}
+BODY = {"candidates": [{"content": {"parts": [{"text": "{}"}]}}]}
+
+
+def test_text_cache_round_trip_per_version(tmp_path):
+    cache = TextCache(str(tmp_path / "texts.sqlite3"), extractor_version="plumber-1")
+    cache.put("abc", "page one\f\npage two")
+    cache.put("abc", "other backend", extractor_version="fitz-1")
+    assert cache.get("abc") == "page one\f\npage two"
+    assert cache.get("abc", "fitz-1") == "other backend"
+    assert cache.get("missing") is None
+    assert list(cache.iter_texts()) == [("abc", "page one\f\npage two")]
+
+
+def test_text_in_an_older_format_is_not_replayed(tmp_path, monkeypatch):
+    cache = TextCache(str(tmp_path / "texts.sqlite3"))
+    monkeypatch.setattr(text_cache, "TEXT_FORMAT", text_cache.TEXT_FORMAT - 1)
+    cache.put("abc", "pages joined the old way")
+    monkeypatch.undo()
+    assert cache.get("abc") is None
+    assert list(cache.iter_texts()) == []
+
+
+def test_text_cache_evicts_least_recently_used(tmp_path):
+    cache = TextCache(str(tmp_path / "texts.sqlite3"), max_entries=2)
+    cache.put("a", "A")
+    time.sleep(0.01)
+    cache.put("b", "B")
+    time.sleep(0.01)
+    cache.get("a")
+    cache.put("c", "C")
+    assert [cache.get(h) for h in ("a", "b", "c")] == ["A", None, "C"]
+
+
+def test_llm_key_covers_endpoint_model_and_payload():
+    key = LLMResponseCache.make_key("gemini", PAYLOAD, "https://api")
+    assert key == LLMResponseCache.make_key("gemini", dict(PAYLOAD), "https://api")
+    assert key != LLMResponseCache.make_key("gemini", PAYLOAD, "http://localhost:8000")
+    assert key != LLMResponseCache.make_key("other", PAYLOAD, "https://api")
+    assert key != LLMResponseCache.make_key("gemini", {"contents": []}, "https://api")
+
+
+def test_llm_cache_counts_hits_and_expires(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite3"), ttl_seconds=60)
+    key = cache.make_key("gemini", PAYLOAD)
+    assert cache.get(key) is None
+    cache.put(key, BODY)
+    assert cache.get(key) == BODY
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    cache.ttl_seconds = 0
+    time.sleep(0.01)
+    assert cache.get(key) is None
+
+
+def test_client_answers_from_the_cache(tmp_path, monkeypatch):
+    pytest.importorskip("requests")
+    from llm_client import GeminiClient
+
+    client = GeminiClient("key", cache=LLMResponseCache(str(tmp_path / "llm.sqlite3")))
+    calls = []
+    monkeypatch.setattr(client, "generate_content", lambda payload: calls.append(payload) or BODY)
+    assert client.cached_generate_content(PAYLOAD) == (BODY, False)
+    assert client.cached_generate_content(PAYLOAD) == (BODY, True)
+    assert len(calls) == 1
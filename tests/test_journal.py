@@ -0,0 +1,91 @@
+import pytest
+import journal
+from cache_utils import sha256_hex
+from journal import JobJournal
+
+
+def _finish(job: JobJournal, path: str, data: bytes, total_due: str) -> None:
+    job.start(path)
+    job.finish(path, {"status": "SUCCESS", "sha256": sha256_hex(data), "total_due": total_due})
+
+
+def test_completed_results_are_replayed(tmp_path):
+    pdf = tmp_path / "a.pdf"
+    pdf.write_bytes(b"one")
+    with JobJournal("job", str(tmp_path / "jobs")) as job:
+        _finish(job, str(pdf), b"one", "10.00")
+    with JobJournal("job", str(tmp_path / "jobs")) as job:
+        offset = job.completed(str(pdf))
+        assert offset is not None
+        assert job.result(offset)["total_due"] == "10.00"
+        assert job.replayed == 1
+
+
+def test_modified_file_is_reparsed_and_exported_again(tmp_path):
+    pdf = tmp_path / "a.pdf"
+    pdf.write_bytes(b"one")
+    with JobJournal("job", str(tmp_path / "jobs")) as job:
+        _finish(job, str(pdf), b"one", "10.00")
+        job.mark_exported([str(pdf)])
+
+    pdf.write_bytes(b"two!")
+    with JobJournal("job", str(tmp_path / "jobs")) as job:
+        assert job.completed(str(pdf)) is None
+        _finish(job, str(pdf), b"two!", "20.00")
+        assert str(pdf) not in job.exported
+
+    with JobJournal("job", str(tmp_path / "jobs")) as job:
+        assert str(pdf) not in job.exported
+        assert job.result(job.completed(str(pdf)))["total_due"] == "20.00"
+
+
+def test_unfinished_start_counts_as_an_attempt(tmp_path):
+    with JobJournal("job", str(tmp_path)) as job:
+        job.start("a.pdf")
+        job.start("b.pdf")
+        job.cancel("b.pdf")
+    with JobJournal("job", str(tmp_path)) as job:
+        assert job.attempts == {"a.pdf": 1, "b.pdf": 0}
+
+
+def test_torn_last_record_is_dropped(tmp_path):
+    pdf = tmp_path / "a.pdf"
+    pdf.write_bytes(b"one")
+    with JobJournal("job", str(tmp_path / "jobs")) as job:
+        _finish(job, str(pdf), b"one", "10.00")
+        path = job.path
+    with open(path, "ab") as f:
+        f.write(b'{"event": "done", "pa')
+    with JobJournal("job", str(tmp_path / "jobs")) as job:
+        assert job.completed(str(pdf)) is not None
+    with open(path, "rb") as f:
+        assert f.read().endswith(b"}\n")
+
+
+def test_invalid_job_id(tmp_path):
+    with pytest.raises(ValueError):
+        JobJournal("../escape", str(tmp_path))
+
+
+def test_resumed_job_exports_modified_file(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    import batch
+    from benchmarks.synthetic import generate_statement_pdf
+    from parquet_export import open_dataset
+
+    monkeypatch.setattr(journal, "JOURNAL_DIR", str(tmp_path / "jobs"))
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    pdf = docs / "hdfc.pdf"
+    pdf.write_bytes(generate_statement_pdf("hdfc", pages=1, transactions=5, seed=1)[0])
+    args = [str(docs), "-o", str(tmp_path / "out.jsonl"), "--workers", "1", "--no-llm",
+            "--job-id", "resume", "--parquet-dir", str(tmp_path / "parquet")]
+    assert batch.main(args) == 0
+
+    data, expected = generate_statement_pdf("hdfc", pages=1, transactions=5, seed=2)
+    pdf.write_bytes(data)
+    assert batch.main(args) == 0
+
+    rows = open_dataset(str(tmp_path / "parquet")).to_table(columns=["total_due"]).to_pylist()
+    totals = {str(row["total_due"]) for row in rows}
+    assert expected["total_due"].replace(",", "") in totals
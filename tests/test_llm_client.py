@@ -0,0 +1,40 @@
+import asyncio
+import pytest
+
+pytest.importorskip("requests")
+from llm_client import GeminiClient
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, body: dict = None):
+        self.status_code = status_code
+        self.body = body or {}
+        self.headers = {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+    def json(self):
+        return self.body
+
+
+def test_semaphores_do_not_outlive_their_loops(monkeypatch):
+    client = GeminiClient("key", max_concurrency=1)
+    monkeypatch.setattr(client, "generate_content", lambda payload: {"candidates": [payload]})
+
+    async def burst():
+        # Two calls on one slot, so the semaphore really waits (and binds its loop).
+        return await asyncio.gather(client.agenerate_content({"n": 1}), client.agenerate_content({"n": 2}))
+
+    for _ in range(5):
+        assert len(asyncio.run(burst())) == 2
+    assert len(client._semaphores) <= 1
+
+
+def test_retryable_status_is_retried(monkeypatch):
+    client = GeminiClient("key", backoff_base=0.0)
+    responses = [FakeResponse(503), FakeResponse(200, {"candidates": ["ok"]})]
+    monkeypatch.setattr(client.session, "post", lambda *args, **kwargs: responses.pop(0))
+    assert client.generate_content({}) == {"candidates": ["ok"]}
+    assert responses == []
@@ -0,0 +1,43 @@
+import urllib.error
+import urllib.request
+import pytest
+from metrics import MetricsRegistry, serve_metrics
+
+RESULT = {
+    "status": "SUCCESS", "bank_name": "HDFC Bank", "extraction_method": "regex", "cache_status": "MISS",
+    "llm_cache_hits": 0, "llm_cache_misses": 0,
+    "timings": {"total_ms": 120.0, "page_ms": [40.0, 60.0],
+                "fields": {"total_due": {"ms": 0.5, "source": "regex", "pattern_index": 0, "region": "summary"}}},
+}
+
+
+def test_observe_result_renders_counters_and_histograms():
+    registry = MetricsRegistry(buckets=[0.05, 0.5])
+    registry.observe_result(RESULT)
+    rendered = registry.render_prometheus()
+    assert 'ccparser_documents_total{bank="HDFC Bank",method="regex",status="SUCCESS"} 1' in rendered
+    assert "ccparser_pages_total 2" in rendered
+    assert 'ccparser_stage_duration_seconds_bucket{stage="page_extract",le="0.05"} 1' in rendered
+    assert 'ccparser_stage_duration_seconds_bucket{stage="total",le="+Inf"} 1' in rendered
+    assert 'field="total_due"' in rendered and 'region="summary"' in rendered
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.inc("documents_total", "Documents.", bank='a"b\\c\nd')
+    assert 'bank="a\\"b\\\\c\\nd"' in registry.render_prometheus()
+
+
+def test_endpoint_serves_metrics_only():
+    registry = MetricsRegistry()
+    registry.observe_result(RESULT)
+    server = serve_metrics(0, registry, host="127.0.0.1")
+    try:
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        with urllib.request.urlopen(f"{base}/metrics", timeout=5) as response:
+            assert "ccparser_documents_total" in response.read().decode("utf-8")
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"{base}/other", timeout=5)
+    finally:
+        server.shutdown()
+        server.server_close()
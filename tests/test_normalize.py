@@ -0,0 +1,50 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+import normalize
+from benchmarks.synthetic import AMOUNT_SAMPLES
+from normalize import AMOUNT_SCALE, _scalar_units, amounts_to_fixed_point, clean_amounts
+from parser import clean_amount
+
+EDGE_AMOUNTS = AMOUNT_SAMPLES + [
+    "₹22,935.00", "₹ 1,00,000", "500.00Cr", "500.00 cr", "1,200.00 Dr.", "(  450.50 )",
+    "1,,234..5", ",", "Rs.", "١٢.50", "£12.30", "9" * 60 + ".99", "12.345",
+]
+
+
+@pytest.fixture(params=["scalar", "vectorized"])
+def path(request, monkeypatch):
+    if request.param == "vectorized":
+        monkeypatch.setattr(normalize, "SCALAR_MAX_ROWS", 0)
+    return request.param
+
+
+def test_clean_amounts_matches_clean_amount(path):
+    values = pd.Series(EDGE_AMOUNTS)
+    assert clean_amounts(values).tolist() == [clean_amount(v) for v in EDGE_AMOUNTS]
+
+
+def test_fixed_point_matches_scalar_units(path):
+    values = pd.Series(EDGE_AMOUNTS)
+    expected = [_scalar_units(v, AMOUNT_SCALE) for v in EDGE_AMOUNTS]
+    assert amounts_to_fixed_point(values).tolist() == expected
+
+
+def test_fixed_point_values(path):
+    values = pd.Series(["₹22,935.00", "4,500.25 Dr", "(1,200.00)", "99.995", "NOT_FOUND", "", None])
+    assert amounts_to_fixed_point(values).tolist() == [2293500, 450025, 120000, 10000, pd.NA, pd.NA, pd.NA]
+
+
+def test_missing_values_stay_missing(path):
+    cleaned = clean_amounts(pd.Series(["1,000.00", None, ""], index=[5, 6, 7]))
+    assert cleaned.index.tolist() == [5, 6, 7]
+    assert cleaned.tolist() == ["1000.00", pd.NA, ""]
+
+
+def test_long_columns_span_chunks(monkeypatch):
+    monkeypatch.setattr(normalize, "CHUNK_ROWS", 7)
+    values = pd.Series(EDGE_AMOUNTS * 40)
+    assert len(values) >= normalize.SCALAR_MAX_ROWS
+    assert clean_amounts(values).tolist() == [clean_amount(v) for v in values]
+    assert amounts_to_fixed_point(values).tolist() == [_scalar_units(v, AMOUNT_SCALE) for v in values]
@@ -0,0 +1,51 @@
+from decimal import Decimal
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+import pyarrow.dataset as ds
+from parquet_export import ParquetExporter, open_dataset
+
+RESULTS = [
+    {"path": "a.pdf", "status": "SUCCESS", "bank_name": "HDFC BANK", "extraction_method": "regex",
+     "statement_date": "15/03/2024", "payment_due_date": "04/04/2024", "total_due": "₹22,935.00",
+     "min_payment": "1,146.75", "card_last_4_digits": "1234", "raw_text": "...", "timings": {"total_ms": 1.0},
+     "transactions": [
+         {"date": "02/03/2024", "description": "SWIGGY", "amount": "450.50", "direction": "Dr", "page": 1},
+         {"date": "05/03/2024", "description": "PAYMENT", "amount": "2000.00", "direction": "Cr", "page": 2},
+     ]},
+    {"path": "b.pdf", "status": "SUCCESS", "bank_name": "AXIS BANK", "extraction_method": "regex",
+     "statement_date": "NOT_FOUND", "payment_due_date": "NOT_FOUND", "total_due": "NOT_FOUND",
+     "min_payment": "NOT_FOUND", "card_last_4_digits": "NOT_FOUND", "transactions": []},
+    {"path": "c.pdf", "status": "FAILED", "reason": "Could not read PDF"},
+]
+
+
+def test_round_trip_with_decimal_amounts_and_partitions(tmp_path):
+    with ParquetExporter(str(tmp_path), flush_documents=2) as exporter:
+        for result in RESULTS:
+            exporter.write(result)
+    assert (exporter.documents_written, exporter.transactions_written) == (3, 2)
+
+    rows = {r["path"]: r for r in open_dataset(str(tmp_path)).to_table().to_pylist()}
+    hdfc = rows["a.pdf"]
+    assert (hdfc["bank"], hdfc["statement_month"]) == ("hdfc", "2024-03")
+    assert hdfc["total_due"] == Decimal("22935.00") and hdfc["min_payment"] == Decimal("1146.75")
+    assert hdfc["statement_date"].isoformat() == "2024-03-15"
+    assert hdfc["transaction_count"] == 2
+    assert rows["b.pdf"]["total_due"] is None and rows["b.pdf"]["statement_month"] == "unknown"
+    assert (rows["c.pdf"]["bank"], rows["c.pdf"]["reason"]) == ("unknown", "Could not read PDF")
+
+    transactions = open_dataset(str(tmp_path), "transactions").to_table().to_pylist()
+    assert [(t["amount"], t["direction"], t["page"], t["bank"]) for t in transactions] == [
+        (Decimal("450.50"), "Dr", 1, "hdfc"), (Decimal("2000.00"), "Cr", 2, "hdfc"),
+    ]
+
+
+def test_partition_filters_and_appends(tmp_path):
+    for _ in range(2):
+        with ParquetExporter(str(tmp_path)) as exporter:
+            exporter.write(RESULTS[0])
+    table = open_dataset(str(tmp_path)).to_table(columns=["total_due"], filter=ds.field("bank") == "hdfc")
+    assert table.column("total_due").to_pylist() == [Decimal("22935.00")] * 2
+    assert open_dataset(str(tmp_path)).to_table(filter=ds.field("bank") == "axis").num_rows == 0
@@ -0,0 +1,25 @@
+import pytest
+from benchmarks.synthetic import LAYOUT_VARIANTS, generate_statement_pages, statement_text
+from parser import KEYS_TO_SEARCH, PAGE_BREAK, extract_fields
+
+
+@pytest.mark.parametrize("bank_key, variant", [(b, v) for b, variants in LAYOUT_VARIANTS.items() for v in variants])
+def test_layout_variants(bank_key, variant):
+    lines, expected = generate_statement_pages(bank_key, 3, 60, 0, variant)
+    found = extract_fields(statement_text(lines), bank_key, KEYS_TO_SEARCH)
+    assert {key: found.get(key) for key in KEYS_TO_SEARCH} == {key: expected[key] for key in KEYS_TO_SEARCH}
+
+
+def test_transaction_pages_cannot_overrule_a_summary_hit():
+    lines, expected = generate_statement_pages("axis", 30, 600, 0)
+    # Matches a higher-priority card pattern than the header does, pages away from it.
+    text = statement_text(lines) + PAGE_BREAK + "Credit Card Number : XXXX9999\n"
+    timings = {}
+    found = extract_fields(text, "axis", ["card_last_4_digits"], timings)
+    assert found["card_last_4_digits"] == expected["card_last_4_digits"]
+    assert timings["fields"]["card_last_4_digits"]["region"] == "header"
+
+
+def test_whole_text_is_searched_without_a_regional_hit():
+    text = "AXIS BANK\n" + "filler line\n" * 400 + "Credit Card Number : XXXX4321\n"
+    assert extract_fields(text, "axis", ["card_last_4_digits"]) == {"card_last_4_digits": "4321"}
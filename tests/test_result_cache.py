@@ -0,0 +1,47 @@
+import pytest
+from benchmarks.synthetic import generate_statement_pdf
+from metrics import MetricsRegistry
+from result_cache import ResultCache, cached_parse_statement
+from text_cache import TextCache
+
+
+@pytest.fixture
+def pdf_bytes():
+    pytest.importorskip("pdfplumber")
+    return generate_statement_pdf("icici", pages=2, transactions=10, seed=4)[0]
+
+
+def test_hit_returns_the_stored_fields_without_timings(tmp_path, pdf_bytes):
+    cache = ResultCache(str(tmp_path / "results.sqlite3"))
+    miss = cached_parse_statement(pdf_bytes, cache=cache)
+    hit = cached_parse_statement(pdf_bytes, cache=cache)
+    assert (miss["cache_status"], hit["cache_status"]) == ("MISS", "HIT")
+    assert "timings" in miss and "timings" not in hit
+    assert hit["total_due"] == miss["total_due"]
+
+    registry = MetricsRegistry()
+    registry.observe_result(hit)
+    rendered = registry.render_prometheus()
+    assert 'result_cache_lookups_total{result="HIT"} 1' in rendered
+    assert "stage_duration_seconds" not in rendered
+
+
+def test_text_cache_replays_the_text_stage(tmp_path, pdf_bytes, monkeypatch):
+    texts = TextCache(str(tmp_path / "texts.sqlite3"))
+    first = cached_parse_statement(pdf_bytes, text_cache=texts)
+
+    def no_pdf(*args, **kwargs):
+        raise AssertionError("PDF read despite cached text")
+
+    monkeypatch.setattr("text_cache.extract_text_from_pdf", no_pdf)
+    second = cached_parse_statement(pdf_bytes, text_cache=texts)
+    assert second["total_due"] == first["total_due"]
+
+
+def test_template_change_invalidates_cached_results(tmp_path, pdf_bytes, monkeypatch):
+    cache = ResultCache(str(tmp_path / "results.sqlite3"))
+    cached_parse_statement(pdf_bytes, cache=cache)
+    fingerprints = dict(cache.fingerprints)
+    fingerprints["icici"] = "changed"
+    monkeypatch.setattr(cache, "fingerprints", fingerprints)
+    assert cached_parse_statement(pdf_bytes, cache=cache)["cache_status"] == "MISS"
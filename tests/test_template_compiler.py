@@ -0,0 +1,61 @@
+import re
+import pytest
+import template_compiler
+from benchmarks.synthetic import generate_statement_pages, statement_text
+from regex_patterns import REGEX_TEMPLATES
+from template_compiler import PATTERN_FLAGS, _re2_pattern, compile_pattern, engine_report
+
+
+def _unicode_spaced(text: str) -> str:
+    """Every other space becomes a non-breaking or thin space, as some PDF extractors emit."""
+    parts = text.split(" ")
+    spaces = ["\u00a0", " ", "\u2009", " "]
+    return "".join(part + spaces[i % len(spaces)] for i, part in enumerate(parts[:-1])) + parts[-1]
+
+
+@pytest.mark.parametrize("pattern, expected", [
+    (r"a\s+b", r"a[\s\p{Z}\x{85}\x{1c}-\x{1f}]+b"),
+    (r"[\s,]+\d", r"[\s\p{Z}\x{85}\x{1c}-\x{1f},]+\p{Nd}"),
+    (r"\S+", r"[^\s\p{Z}\x{85}\x{1c}-\x{1f}]+"),
+    (r"Due[\s\S]{0,10}", r"Due[\s\S]{0,10}"),
+    (r"[]s]\.", r"[]s]\."),
+])
+def test_re2_rewrite(pattern, expected):
+    assert _re2_pattern(pattern) == expected
+
+
+@pytest.mark.parametrize("pattern", [r"\w+", r"\bDue", r"[\S,]"])
+def test_re2_rewrite_refuses_ascii_only_classes(pattern):
+    with pytest.raises(ValueError):
+        _re2_pattern(pattern)
+
+
+@pytest.mark.parametrize("bank_key", list(REGEX_TEMPLATES))
+def test_re2_matches_re_on_unicode_whitespace(bank_key):
+    if template_compiler.re2 is None:
+        pytest.skip("google-re2 not installed")
+    page_lines, _ = generate_statement_pages(bank_key, 2, 20, 0)
+    text = _unicode_spaced(statement_text(page_lines))
+    assert "\u00a0" in text
+    for field, pattern_strs in REGEX_TEMPLATES[bank_key].get("patterns", {}).items():
+        for pattern_str in pattern_strs:
+            try:
+                compiled, engine, _ = compile_pattern(pattern_str, "auto")
+            except re.error:
+                continue
+            if engine != "re2":
+                continue
+            expected = re.compile(pattern_str, PATTERN_FLAGS).search(text)
+            found = compiled.search(text)
+            assert (found and found.group(0)) == (expected and expected.group(0)), (field, pattern_str)
+
+
+def test_engine_report_names_the_engine_that_runs():
+    rows = engine_report()
+    engines = {row["engine"] for row in rows}
+    if template_compiler.regex_module is not None and template_compiler.PATTERN_TIME_BUDGET_MS:
+        assert "re" not in engines
+    assert engines <= {"re2", "regex", "re", "none"}
+    for row in rows:
+        if row["engine"] == "none":
+            assert row["fallback_reason"]
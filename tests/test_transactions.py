@@ -0,0 +1,41 @@
+import pytest
+from benchmarks.synthetic import generate_statement_pages, statement_text
+from regex_patterns import REGEX_TEMPLATES
+from transactions import iter_page_transactions, iter_transactions_from_pages
+
+PAGE = (
+    "01/02/2024 Opening Balance 1,000.00\n"
+    "03/02/2024 SWIGGY BANGALORE 450.50\n"
+    "05/02/2024 PAYMENT RECEIVED 2,000.00 Cr\n"
+    "06/02/2024 End of Statement 0.00\n"
+    "07/02/2024 Purchases & Other Charges 450.50\n"
+)
+
+
+def test_rows_and_directions():
+    rows = list(iter_page_transactions(PAGE, "hdfc", page=2))
+    assert [(r.description, r.amount, r.direction, r.page) for r in rows] == [
+        ("SWIGGY BANGALORE", "450.50", "Dr", 2),
+        ("PAYMENT RECEIVED", "2000.00", "Cr", 2),
+        ("End of Statement", "0.00", "Dr", 2),
+        ("Purchases & Other Charges", "450.50", "Dr", 2),
+    ]
+
+
+@pytest.mark.parametrize("bank_key, skipped", [
+    ("axis", "End of Statement"),
+    ("idfc", "Purchases & Other Charges"),
+])
+def test_bank_tables_skip_their_own_summary_lines(bank_key, skipped):
+    descriptions = [r.description for r in iter_page_transactions(PAGE, bank_key)]
+    assert skipped not in descriptions
+    assert "SWIGGY BANGALORE" in descriptions
+
+
+@pytest.mark.parametrize("bank_key", list(REGEX_TEMPLATES))
+def test_every_synthetic_row_is_found(bank_key):
+    lines, _ = generate_statement_pages(bank_key, 3, 40, 5)
+    pages = [statement_text([page]) for page in lines]
+    rows = list(iter_transactions_from_pages(pages))
+    assert len(rows) == 40
+    assert {row.page for row in rows} <= set(range(1, len(pages)))
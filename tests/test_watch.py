@@ -0,0 +1,71 @@
+import os
+import shutil
+import sys
+import pytest
+import watch
+from benchmarks.synthetic import generate_statement_pdf
+from metrics import MetricsRegistry
+from watch import Manifest, StatementWatcher
+
+pytest.importorskip("pdfplumber")
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "statements"
+    root.mkdir()
+    (root / "hdfc.pdf").write_bytes(generate_statement_pdf("hdfc", pages=1, transactions=5, seed=1)[0])
+    return root
+
+
+def _watcher(tmp_path, root) -> StatementWatcher:
+    return StatementWatcher(str(root), Manifest(str(tmp_path / "manifest.sqlite3")), {"workers": 1}, settle_seconds=0)
+
+
+def _once(watcher: StatementWatcher):
+    return list(watcher.run(once=True))
+
+
+def test_unchanged_files_are_not_parsed_again(tmp_path, tree):
+    watcher = _watcher(tmp_path, tree)
+    assert [r["status"] for r in _once(watcher)] == ["SUCCESS"]
+    assert _once(watcher) == []
+    assert watcher.stats["parsed"] == 1
+    assert watcher.stats["unchanged"] == 1
+
+
+def test_copy_reuses_the_stored_result_without_timings(tmp_path, tree):
+    watcher = _watcher(tmp_path, tree)
+    parsed = _once(watcher)[0]
+    shutil.copy(tree / "hdfc.pdf", tree / "copy.pdf")
+    reused = _once(watcher)
+    assert [r["path"] for r in reused] == [os.path.join(str(tree), "copy.pdf")]
+    assert reused[0]["total_due"] == parsed["total_due"]
+    assert reused[0]["cache_status"] == "HIT"
+    assert "timings" not in reused[0]
+    assert watcher.stats["parsed"] == 1 and watcher.stats["reused"] == 1
+
+    registry = MetricsRegistry()
+    registry.observe_result(reused[0])
+    assert "stage_duration_seconds" not in registry.render_prometheus()
+
+
+def test_deleted_files_leave_the_manifest(tmp_path, tree):
+    watcher = _watcher(tmp_path, tree)
+    _once(watcher)
+    os.remove(tree / "hdfc.pdf")
+    _once(watcher)
+    assert watcher.stats["deleted"] == 1
+    assert watcher.manifest.get(os.path.join(str(tree), "hdfc.pdf")) is None
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux-only")
+def test_watch_limit_on_a_new_directory_falls_back_to_polling(tmp_path, tree, monkeypatch):
+    def events(self, timeout):
+        raise OSError(28, "inotify_add_watch failed")
+
+    monkeypatch.setattr(watch.InotifyWatcher, "events", events)
+    rounds = _watcher(tmp_path, tree)._rounds(once=False, polling=False, poll_interval=0.01, full_scan_interval=60)
+    assert next(rounds) == [("rescan", str(tree))]
+    assert next(rounds) == [("rescan", str(tree))]
+    rounds.close()
@@ -0,0 +1,113 @@
+import io
+import os
+import sqlite3
+import sys
+import time
+import zlib
+from contextlib import closing
+from typing import Dict, Any, Iterator, Optional, Tuple
+from parser import extract_text_from_pdf, parse_text
+from pdf_backends import ACCURATE_BACKEND, get_backend
+from cache_utils import CACHE_DIR, evict_lru, sha256_hex
+
+DEFAULT_MAX_ENTRIES = 100000
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024 * 1024
+EXTRACTOR_VERSION = get_backend(ACCURATE_BACKEND).version
+# Version of extract_text_from_pdf's output format (2: pages joined by
+# PAGE_BREAK), so text cached in an older format is not replayed.
+TEXT_FORMAT = 2
+
+
+class TextCache:
+    """
+    Persistent, zlib-compressed cache of extract_text_from_pdf output, keyed
+    by the SHA-256 of the PDF bytes and the text extractor version. PDFs never
+    change, so template edits can be re-validated by replaying the cheap
+    regex stage over cached text instead of re-running pdfplumber.
+    get/put take another backend's version to cache its text alongside;
+    iter_texts only replays the instance's own extractor version.
+    """
+
+    def __init__(self, path: str = None, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_BYTES, extractor_version: str = EXTRACTOR_VERSION):
+        if path is None:
+            path = os.path.join(CACHE_DIR, "texts.sqlite3")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.extractor_version = extractor_version
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS texts ("
+                " key TEXT PRIMARY KEY, pdf_hash TEXT, text BLOB, size INTEGER,"
+                " created REAL, accessed REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS texts_accessed ON texts (accessed)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def make_key(self, pdf_hash: str, extractor_version: str = None) -> str:
+        return f"{pdf_hash}:{extractor_version or self.extractor_version}:v{TEXT_FORMAT}"
+
+    def get(self, pdf_hash: str, extractor_version: str = None) -> Optional[str]:
+        key = self.make_key(pdf_hash, extractor_version)
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute("SELECT text FROM texts WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE texts SET accessed = ? WHERE key = ?", (time.time(), key))
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def put(self, pdf_hash: str, text: str, extractor_version: str = None) -> None:
+        blob = zlib.compress(text.encode("utf-8"), 6)
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO texts VALUES (?, ?, ?, ?, ?, ?)",
+                (self.make_key(pdf_hash, extractor_version), pdf_hash, blob, len(blob), now, now),
+            )
+            evict_lru(conn, "texts", self.max_entries, self.max_bytes)
+
+    def iter_texts(self) -> Iterator[Tuple[str, str]]:
+        """Yields (pdf_hash, text) for every entry of the current extractor version."""
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "SELECT pdf_hash, text FROM texts WHERE key LIKE ?", (f"%:{self.extractor_version}:v{TEXT_FORMAT}",)
+            )
+            for pdf_hash, blob in cursor:
+                yield pdf_hash, zlib.decompress(blob).decode("utf-8")
+
+
+def cached_extract_text(pdf_bytes: bytes, cache: TextCache = None, pdf_hash: str = None,
+                        backend: str = None) -> str:
+    """Text stage: returns the PDF text from `backend` (default pdfplumber), from the cache when available."""
+    if cache is None:
+        return extract_text_from_pdf(io.BytesIO(pdf_bytes), backend=backend)
+
+    pdf_hash = pdf_hash or sha256_hex(pdf_bytes)
+    version = get_backend(backend).version
+    try:
+        text = cache.get(pdf_hash, version)
+    except sqlite3.Error as e:
+        print(f"Text cache read failed: {e}", file=sys.stderr)
+        text = None
+    if text is not None:
+        return text
+
+    text = extract_text_from_pdf(io.BytesIO(pdf_bytes), backend=backend)
+    if text:
+        try:
+            cache.put(pdf_hash, text, version)
+        except sqlite3.Error as e:
+            print(f"Text cache write failed: {e}", file=sys.stderr)
+    return text
+
+
+def replay_extract_stage(cache: TextCache, api_key: str = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Re-runs only the extract stage over every cached text; yields (pdf_hash, result)."""
+    for pdf_hash, text in cache.iter_texts():
+        yield pdf_hash, parse_text(text, api_key=api_key)
@@ -0,0 +1,149 @@
+import argparse
+import io
+import json
+import re
+import sys
+import time
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Pattern, Tuple
+from regex_patterns import TRANSACTION_TABLES
+from template_compiler import compile_pattern
+from parser import WHITESPACE_RUN, clean_amount, identify_bank, iter_pdf_pages
+
+
+class TransactionRow(NamedTuple):
+    date: str
+    description: str
+    amount: str
+    direction: str  # "Dr" or "Cr"
+    page: int
+
+
+def compile_transaction_tables(tables: Dict[str, dict]) -> Dict[str, Tuple[List[Pattern], Pattern]]:
+    """Turns each bank's table settings into (row_patterns, skip_pattern)."""
+    compiled = {}
+    for bank_key, settings in tables.items():
+        row_patterns = []
+        for pattern_str in settings.get("row_patterns", []):
+            try:
+                row_patterns.append(compile_pattern(pattern_str)[0])
+            except re.error as e:
+                print(f"Regex error for {bank_key} transaction row: {e}", file=sys.stderr)
+        skip = settings.get("skip_descriptions", [])
+        skip_pattern = re.compile("|".join(f"(?:{s})" for s in skip), re.IGNORECASE) if skip else None
+        compiled[bank_key] = (row_patterns, skip_pattern)
+    return compiled
+
+
+COMPILED_TRANSACTION_TABLES = compile_transaction_tables(TRANSACTION_TABLES)
+
+
+def iter_page_transactions(page_text: str, bank_key: str, page: int = 0) -> Iterator[TransactionRow]:
+    """Yields the transaction rows printed on one page, in line order."""
+    row_patterns, skip_pattern = COMPILED_TRANSACTION_TABLES.get(bank_key, COMPILED_TRANSACTION_TABLES["default"])
+    matches = []
+    seen = set()
+    for pattern in row_patterns:
+        for match in pattern.finditer(page_text):
+            # An earlier pattern already claimed this line.
+            if match.start() in seen:
+                continue
+            seen.add(match.start())
+            matches.append(match)
+    if len(row_patterns) > 1:
+        matches.sort(key=lambda m: m.start())
+
+    for match in matches:
+        description = WHITESPACE_RUN.sub(" ", match.group("description")).strip()
+        if skip_pattern is not None and skip_pattern.search(description):
+            continue
+        direction = match.group("direction") or "Dr"
+        yield TransactionRow(
+            date=WHITESPACE_RUN.sub(" ", match.group("date")),
+            description=description,
+            amount=clean_amount(match.group("amount")),
+            direction="Cr" if direction.upper() == "CR" else "Dr",
+            page=page,
+        )
+
+
+def iter_transactions_from_pages(pages: Iterable[str], bank_key: str = None,
+                                 timings: Dict[str, Any] = None) -> Iterator[TransactionRow]:
+    """
+    Yields transaction rows from an iterable of page texts, holding one page
+    at a time. Without a bank_key the bank is identified from the first
+    page that names one; pages before it are parsed with the default table.
+    """
+    bank_known = bank_key is not None and bank_key != "unknown"
+    if timings is not None:
+        timings.setdefault("transaction_rows", 0)
+        timings.setdefault("transaction_parse_ms", 0.0)
+    for page, page_text in enumerate(pages):
+        start = time.perf_counter()
+        if not bank_known:
+            bank_key = identify_bank(page_text)
+            bank_known = bank_key != "unknown"
+        rows = list(iter_page_transactions(page_text, bank_key if bank_known else "default", page))
+        if timings is not None:
+            timings["transaction_rows"] += len(rows)
+            timings["transaction_parse_ms"] = round(timings["transaction_parse_ms"] + (time.perf_counter() - start) * 1000, 3)
+        yield from rows
+
+
+def iter_transactions(pdf_file: io.BytesIO, bank_key: str = None, backend: str = None,
+                      timings: Dict[str, Any] = None) -> Iterator[TransactionRow]:
+    """
+    Streams the statement's transaction rows page by page. Only the current
+    page's text and rows are held, so memory stays flat on long statements;
+    the PDF is closed as soon as the caller stops iterating.
+    """
+    pages = iter_pdf_pages(pdf_file, timings, backend)
+    try:
+        yield from iter_transactions_from_pages(pages, bank_key, timings)
+    finally:
+        pages.close()
+
+
+def aggregate_spend(rows: Iterable[TransactionRow],
+                    key: Callable[[TransactionRow], str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Folds a row stream into per-key totals (default key: the description,
+    i.e. the merchant) without keeping the rows. Returns
+    {key: {"count", "debits", "credits", "net"}} with Decimal amounts.
+    """
+    key = key or (lambda row: row.description)
+    totals: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        entry = totals.get(key(row))
+        if entry is None:
+            entry = totals[key(row)] = {"count": 0, "debits": Decimal("0"), "credits": Decimal("0")}
+        entry["count"] += 1
+        entry["credits" if row.direction == "Cr" else "debits"] += Decimal(row.amount or "0")
+    for entry in totals.values():
+        entry["net"] = entry["debits"] - entry["credits"]
+    return totals
+
+
+def main(argv: List[str] = None) -> int:
+    arg_parser = argparse.ArgumentParser(description="Stream transaction rows out of a statement PDF as JSON lines.")
+    arg_parser.add_argument("pdf", help="Statement PDF")
+    arg_parser.add_argument("--bank", help="Bank key (default: identify from the first page)")
+    arg_parser.add_argument("--pdf-backend", help="pdf_backends engine to read pages with (default: pdfplumber)")
+    arg_parser.add_argument("--summary", action="store_true", help="Print spend per merchant instead of rows")
+    args = arg_parser.parse_args(argv)
+
+    with open(args.pdf, "rb") as f:
+        rows = iter_transactions(f, args.bank, args.pdf_backend)
+        if args.summary:
+            totals = aggregate_spend(rows)
+            for merchant, entry in sorted(totals.items(), key=lambda item: item[1]["net"], reverse=True):
+                print(json.dumps({"merchant": merchant, "count": entry["count"], "debits": str(entry["debits"]),
+                                  "credits": str(entry["credits"]), "net": str(entry["net"])}, ensure_ascii=False))
+        else:
+            for row in rows:
+                print(json.dumps(row._asdict(), ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,453 @@
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import sqlite3
+import struct
+import sys
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+from batch import ResultWriter, build_arg_parser, run_batch
+from cache_utils import CACHE_DIR, sha256_hex
+from metrics import REGISTRY, serve_metrics
+from result_cache import bank_key_for_result, template_fingerprints
+
+# A file is only parsed once its mtime is this old, so half-copied files are
+# picked up on a later pass instead of being parsed truncated.
+SETTLE_SECONDS = 2.0
+POLL_INTERVAL_SECONDS = 5.0
+# Polling only re-lists directories whose mtime moved, which misses files
+# rewritten in place; a full rescan this often catches those.
+FULL_SCAN_INTERVAL_SECONDS = 600.0
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+# Watcher events: ("file", path) a file may be new or changed, ("delete", path)
+# it is gone, ("list", directory) re-list one directory, ("rescan", directory)
+# re-list a whole tree.
+Event = Tuple[str, str]
+
+
+def is_statement(path: str) -> bool:
+    return path.lower().endswith(".pdf")
+
+
+class Manifest:
+    """
+    On-disk record of every statement seen: path, size, mtime, content hash
+    and the parse result. A file whose size and mtime are unchanged is
+    skipped without being read; one whose bytes hash the same reuses its
+    stored result. Results parsed with an older template fingerprint count
+    as changed.
+    """
+
+    def __init__(self, path: str = None):
+        if path is None:
+            path = os.path.join(CACHE_DIR, "manifest.sqlite3")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.fingerprints = template_fingerprints()
+        self.conn = sqlite3.connect(path, timeout=30)
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                " path TEXT PRIMARY KEY, directory TEXT, size INTEGER, mtime_ns INTEGER, sha256 TEXT,"
+                " bank_key TEXT, fingerprint TEXT, result TEXT, parsed REAL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS files_directory ON files (directory)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS files_sha256 ON files (sha256)")
+
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute(
+            "SELECT size, mtime_ns, sha256, bank_key, fingerprint FROM files WHERE path = ?", (path,)
+        ).fetchone()
+        if row is None:
+            return None
+        size, mtime_ns, sha256, bank_key, fingerprint = row
+        return {"size": size, "mtime_ns": mtime_ns, "sha256": sha256,
+                "current": self.fingerprints.get(bank_key) == fingerprint}
+
+    def record(self, path: str, st: os.stat_result, sha256: str, result: Dict[str, Any]) -> None:
+        bank_key = bank_key_for_result(result)
+        stored = {k: v for k, v in result.items() if k not in ("raw_text", "transactions")}
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, os.path.dirname(path), st.st_size, st.st_mtime_ns, sha256, bank_key,
+                 self.fingerprints[bank_key], json.dumps(stored, ensure_ascii=False), time.time()),
+            )
+
+    def find_by_hash(self, sha256: str) -> Optional[Dict[str, Any]]:
+        """A current stored result for the same bytes under any path (a copy or rename)."""
+        rows = self.conn.execute(
+            "SELECT bank_key, fingerprint, result FROM files WHERE sha256 = ?", (sha256,)
+        ).fetchall()
+        for bank_key, fingerprint, result in rows:
+            if self.fingerprints.get(bank_key) == fingerprint:
+                return json.loads(result)
+        return None
+
+    def touch(self, path: str, st: os.stat_result) -> None:
+        """Same bytes under a new mtime (copied again, touched): keep the result."""
+        with self.conn:
+            self.conn.execute("UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?",
+                              (st.st_size, st.st_mtime_ns, path))
+
+    def remove(self, path: str) -> None:
+        with self.conn:
+            self.conn.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    def paths_under(self, directory: str, recursive: bool = True) -> Set[str]:
+        if not recursive:
+            rows = self.conn.execute("SELECT path FROM files WHERE directory = ?", (directory,)).fetchall()
+            return {row[0] for row in rows}
+        # A range on the indexed column rather than a LIKE, which would scan the table.
+        prefix = directory.rstrip(os.sep) + os.sep
+        rows = self.conn.execute(
+            "SELECT path FROM files WHERE directory = ? OR (directory >= ? AND directory < ?)",
+            (directory, prefix, prefix + "\U0010ffff"),
+        ).fetchall()
+        return {row[0] for row in rows}
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class InotifyWatcher:
+    """
+    Linux inotify on every directory of the tree, through libc via ctypes.
+    Raises OSError where inotify is unavailable (other platforms, watch
+    limit reached), so the caller can fall back to PollingWatcher; events
+    raises it too when a new subdirectory cannot be watched.
+    """
+
+    def __init__(self, root: str):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self.libc, "inotify_init1"):
+            raise OSError("inotify is not available on this platform")
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.directories: Dict[int, str] = {}
+        try:
+            self.add_tree(root)
+        except OSError:
+            self.close()
+            raise
+
+    def add_tree(self, root: str) -> None:
+        for directory, _, _ in os.walk(root):
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+            self.directories[wd] = directory
+
+    def events(self, timeout: float) -> List[Event]:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        data = os.read(self.fd, 64 * 1024)
+        events: List[Event] = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                events.extend(("rescan", d) for d in set(self.directories.values()))
+                continue
+            directory = self.directories.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # Files may have landed before the watch existed.
+                    self.add_tree(path)
+                    events.append(("rescan", path))
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    events.append(("rescan", directory))
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                events.append(("file", path))
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                events.append(("delete", path))
+        return events
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class PollingWatcher:
+    """
+    Portable fallback: every poll stats each directory (not each file) and
+    re-lists only the ones whose mtime moved, i.e. where a file was added,
+    removed or renamed.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.mtimes: Dict[str, int] = {}
+        self._stat_tree()
+
+    def _stat_tree(self) -> List[Event]:
+        events: List[Event] = []
+        seen = {}
+        for directory, _, _ in os.walk(self.root):
+            try:
+                seen[directory] = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue
+            if self.mtimes.get(directory) != seen[directory]:
+                events.append(("list", directory))
+        events.extend(("rescan", directory) for directory in self.mtimes.keys() - seen.keys())
+        self.mtimes = seen
+        return events
+
+    def events(self, timeout: float) -> List[Event]:
+        time.sleep(timeout)
+        return self._stat_tree()
+
+    def close(self) -> None:
+        pass
+
+
+class StatementWatcher:
+    """
+    Keeps the manifest in step with a directory tree and parses only
+    statements that are new or whose bytes changed. The startup scan stats
+    every file once; after that each pass costs work proportional to the
+    files that arrived or changed (plus the periodic full scan when polling).
+    """
+
+    def __init__(self, root: str, manifest: Manifest, batch_options: Dict[str, Any] = None,
+                 settle_seconds: float = SETTLE_SECONDS):
+        self.root = os.path.abspath(root)
+        self.manifest = manifest
+        self.batch_options = batch_options or {}
+        self.settle_seconds = settle_seconds
+        self.pending: Set[str] = set()
+        self.copied: List[Dict[str, Any]] = []
+        self.stats = {"parsed": 0, "reused": 0, "unchanged": 0, "deleted": 0}
+
+    def _check(self, path: str, queue: Dict[str, Tuple[os.stat_result, str]]) -> None:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            self._delete(path)
+            return
+        except OSError as e:
+            print(f"Cannot stat {path}: {e}", file=sys.stderr)
+            return
+        known = self.manifest.get(path)
+        if known and known["current"] and (known["size"], known["mtime_ns"]) == (st.st_size, st.st_mtime_ns):
+            self.stats["unchanged"] += 1
+            return
+        if time.time() - st.st_mtime < self.settle_seconds:
+            self.pending.add(path)
+            return
+        self.pending.discard(path)
+        try:
+            with open(path, "rb") as f:
+                sha256 = sha256_hex(f.read())
+        except OSError as e:
+            print(f"Cannot read {path}: {e}", file=sys.stderr)
+            return
+        if known and known["current"] and known["sha256"] == sha256:
+            self.manifest.touch(path, st)
+            self.stats["reused"] += 1
+            return
+        copied = self.manifest.find_by_hash(sha256)
+        if copied is not None:
+            # New path, bytes already parsed: record and report it without
+            # parsing. Its stored timings describe the original parse.
+            copied.pop("timings", None)
+            copied["path"] = path
+            self.manifest.record(path, st, sha256, copied)
+            copied["cache_status"] = "HIT"
+            self.stats["reused"] += 1
+            self.copied.append(copied)
+            return
+        queue[path] = (st, sha256)
+
+    def _delete(self, path: str) -> None:
+        self.pending.discard(path)
+        if self.manifest.get(path) is not None:
+            self.manifest.remove(path)
+            self.stats["deleted"] += 1
+
+    def _scan(self, directory: str, queue: Dict[str, Tuple[os.stat_result, str]], recursive: bool = True) -> None:
+        present = set()
+        for current, subdirectories, files in os.walk(directory):
+            for name in files:
+                path = os.path.join(current, name)
+                if is_statement(path):
+                    present.add(path)
+                    self._check(path, queue)
+            if not recursive:
+                break
+        for path in self.manifest.paths_under(directory, recursive) - present:
+            self._delete(path)
+
+    def process(self, events: List[Event]) -> Iterator[Dict[str, Any]]:
+        """
+        Applies watcher events and yields a result for each statement parsed,
+        and the stored result for each copy of one already parsed.
+        """
+        queue: Dict[str, Tuple[os.stat_result, str]] = {}
+        for path in list(self.pending):
+            self._check(path, queue)
+        for kind, path in events:
+            if kind in ("rescan", "list"):
+                self._scan(path, queue, recursive=kind == "rescan")
+            elif not is_statement(path):
+                continue
+            elif kind == "file":
+                self._check(path, queue)
+            elif kind == "delete":
+                self._delete(path)
+        copied, self.copied = self.copied, []
+        yield from copied
+        if not queue:
+            return
+        for result in run_batch(sorted(queue), **self.batch_options):
+            path = result["path"]
+            st, sha256 = queue[path]
+            # Transient LLM failures are retried the next time the file is seen.
+            if result.get("llm_status") != "FAILED":
+                self.manifest.record(path, st, sha256, result)
+            self.stats["parsed"] += 1
+            yield result
+
+    def _rounds(self, once: bool, polling: bool, poll_interval: float,
+                 full_scan_interval: float) -> Iterator[List[Event]]:
+        watcher = None
+        if not once:
+            if not polling:
+                try:
+                    watcher = InotifyWatcher(self.root)
+                except OSError as e:
+                    print(f"inotify unavailable ({e}); polling every {poll_interval:g}s", file=sys.stderr)
+            if watcher is None:
+                watcher = PollingWatcher(self.root)
+        # Watches are in place before the catch-up scan, so nothing slips between them.
+        yield [("rescan", self.root)]
+        if once:
+            while self.pending:
+                time.sleep(self.settle_seconds)
+                yield []
+            return
+        last_full_scan = time.monotonic()
+        try:
+            while True:
+                timeout = min(poll_interval, self.settle_seconds) if self.pending else poll_interval
+                try:
+                    events = watcher.events(timeout)
+                except OSError as e:
+                    # E.g. the watch limit, hit by a new subdirectory.
+                    print(f"inotify failed ({e}); polling every {poll_interval:g}s", file=sys.stderr)
+                    watcher.close()
+                    watcher = PollingWatcher(self.root)
+                    events = [("rescan", self.root)]
+                    last_full_scan = time.monotonic()
+                if isinstance(watcher, PollingWatcher) and time.monotonic() - last_full_scan >= full_scan_interval:
+                    events.append(("rescan", self.root))
+                    last_full_scan = time.monotonic()
+                yield events
+        finally:
+            watcher.close()
+
+    def run(self, once: bool = False, polling: bool = False, poll_interval: float = POLL_INTERVAL_SECONDS,
+            full_scan_interval: float = FULL_SCAN_INTERVAL_SECONDS,
+            round_done: Callable[[], None] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Catches up with the tree, then (unless once) yields results as
+        statements arrive. round_done is called after each pass that yielded
+        anything, e.g. to flush buffered output.
+        """
+        for events in self._rounds(once, polling, poll_interval, full_scan_interval):
+            produced = False
+            for result in self.process(events):
+                produced = True
+                yield result
+            if produced and round_done is not None:
+                round_done()
+
+
+def main(argv: List[str] = None) -> int:
+    arg_parser = build_arg_parser()
+    arg_parser.description = "Watch a directory and parse statements as they arrive or change."
+    arg_parser.add_argument("--manifest", help="Manifest database (default: <cache dir>/manifest.sqlite3)")
+    arg_parser.add_argument("--once", action="store_true", help="Parse what is new or changed, then exit")
+    arg_parser.add_argument("--polling", action="store_true", help="Poll instead of using inotify")
+    arg_parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL_SECONDS)
+    arg_parser.add_argument("--full-scan-interval", type=float, default=FULL_SCAN_INTERVAL_SECONDS)
+    arg_parser.add_argument("--settle", type=float, default=SETTLE_SECONDS,
+                            help="Seconds a file's mtime must be old before it is parsed")
+    args = arg_parser.parse_args(argv)
+    if not os.path.isdir(args.target):
+        print(f"{args.target} is not a directory", file=sys.stderr)
+        return 1
+    api_key = None if args.no_llm else os.environ.get("GEMINI_API_KEY")
+
+    if args.metrics_port:
+        serve_metrics(args.metrics_port)
+
+    exporter = None
+    if args.parquet_dir:
+        try:
+            from parquet_export import FLUSH_DOCUMENTS, ParquetExporter
+            exporter = ParquetExporter(args.parquet_dir, args.parquet_flush or FLUSH_DOCUMENTS)
+        except ImportError as e:
+            print(f"Parquet export unavailable: {e}", file=sys.stderr)
+            return 1
+
+    manifest = Manifest(args.manifest)
+    watcher = StatementWatcher(args.target, manifest, {
+        "workers": args.workers, "api_key": api_key, "include_raw_text": args.include_raw_text,
+        "text_cache_path": args.text_cache, "pdf_mode": args.pdf_mode, "layout": args.layout_hints,
+        "transactions": args.transactions,
+    }, args.settle)
+    # Appending: results from earlier runs stay in the output file.
+    out = open(args.output, "a", newline="", encoding="utf-8") if args.output else sys.stdout
+    try:
+        writer = ResultWriter(out, args.format, header=out is sys.stdout or out.tell() == 0)
+        for result in watcher.run(args.once, args.polling, args.poll_interval, args.full_scan_interval,
+                                  exporter.flush if exporter is not None else None):
+            REGISTRY.observe_result(result)
+            if exporter is not None:
+                exporter.write(result)
+            writer.write(result)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if exporter is not None:
+            exporter.close()
+        if out is not sys.stdout:
+            out.close()
+        manifest.close()
+
+    print(json.dumps(watcher.stats), file=sys.stderr)
+    if args.metrics_file:
+        REGISTRY.write_prometheus(args.metrics_file)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())